@@ -5,10 +5,28 @@
 
 # Last update 09. October 2024
 
-import hou
+import argparse
+import concurrent.futures
+import functools
+import glob
+import hashlib
 import os
+import queue
 import re
+import shutil
+import subprocess
+import tempfile
+import threading
 import time
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+
+## hou is only available inside a Houdini session, without it the script falls back to the headless library export
+try:
+    import hou
+except ImportError:
+    hou = None
 
 #   ---VARIABLES---
 
@@ -17,8 +35,55 @@ supported_renderers = [
 "MaterialX",
 "MaterialX (USD export optimized)",
 "Mantra",
+"MaterialX + USD library (direct file export)",
 ]
 
+## Suffix for the material names when materials for several renderers are created in one go, so they don't clash inside the same network
+renderer_suffixes = {
+"MaterialX": "MTLX",
+"MaterialX (USD export optimized)": "MTLX_USD",
+"Mantra": "MANTRA",
+}
+
+## Number of background threads scanning and classifying folders while the materials are being created, and how many finished messages may wait for the main thread
+classification_workers = 4
+pipeline_queue_size = 64
+
+## Folders with more files than this are classified in batches (every texture set stays in one batch), so the first materials of a big folder don't wait for the whole folder
+classification_batch_size = 250
+
+## Number of materials written to disk at the same time by the direct file export
+library_export_workers = 8
+
+## File names already used by the direct file export in this run, so texture sets with the same name never overwrite each other
+library_names = set()
+library_names_lock = threading.Lock()
+
+## Policy for texture sets that come in several resolutions (e.g. "_2K", "_4K", "_8K"), only one variant per texture gets used
+## "lowest" for lookdev, "highest" for final renders or "max" for the highest resolution that is not above resolution_max (in K)
+resolution_policy = "highest"
+resolution_max = 4
+
+## Reduced resolution proxy copies of the textures for interactive viewports, created with hoiiotool and cached inside $HOUDINI_TEMP_DIR/PBR-Express/proxies
+## Only used by the MaterialX presets, the "Use Proxy Textures" toggle on the material switches between proxy and full resolution
+generate_proxies = False
+proxy_scale = 25
+proxy_workers = 8
+
+## Callback of the "Extract Resolution Alternates" button, extracts the resolution variants that are still inside their zip archive into the cache on demand
+archive_alternates_callback = '''import os, shutil, tempfile, zipfile
+for line in kwargs["node"].userData("PBR-Express_archive_alternates").splitlines():
+    target_path, archive_path, member = line.split("\\t")
+    if not os.path.isfile(target_path):
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        temp_handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path))
+        with zipfile.ZipFile(archive_path) as archive, archive.open(member) as source, os.fdopen(temp_handle, "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(temp_path, target_path)'''
+
+## Image nodes pointing at a proxy texture by the path of the full resolution file, filled by textureFileParm() so they can be switched back if their proxy couldn't be generated
+proxy_image_nodes = {}
+
 ## List of all possible naming conventions, will check upper case and lower case
 supportedTextures_data = {
     "DIFFUSE":      ['diffuse', 'diff', 'albedo', 'color', 'colour', 'basecolor', 'basecolour'],     
@@ -43,6 +108,16 @@ supportedTextures_data = {
     for key, value in supportedTextures_data.items()
 }    
 
+## Typo tolerant classification for files that don't match any keyword exactly (e.g. "Rougness" or "heigth"), off by default. It runs after the exact and the redirect pass and skips name parts that belong to a known texture set
+## Up to fuzzy_max_distance typos per name part, matches need a confidence (1 - typos / keyword length) of at least fuzzy_min_confidence
+fuzzy_matching = False
+fuzzy_max_distance = 2
+fuzzy_min_confidence = 0.8
+
+## Keyword lookup for the typo tolerant classification, filled by keywordIndex() on first use
+keyword_index = None
+keyword_types = {}
+
 
 #   ---DEFINITIONS---
 ## System condensing this long string into a usable list 
@@ -69,7 +144,9 @@ def getFolderInput():
 
 ## System for prompting the user with a file chooser dialog    
 def getFileInput():    
-    userFileInput = hou.ui.selectFile(title=("Choose the folder containing your materials."), file_type=hou.fileType.Image, multiple_select=True, image_chooser=True)
+    ### Zip archives can be picked next to the images, their content is read without unzipping them
+    file_pattern = " ".join(f"*.{ending}" for ending in validFileTypes() + ["zip"])
+    userFileInput = hou.ui.selectFile(title=("Choose the folder containing your materials."), file_type=hou.fileType.Any, pattern=file_pattern, multiple_select=True, image_chooser=True)
     if len(userFileInput) == 0:
         print(f"[INFO] Script has been canceled.")        
         exit()    
@@ -131,31 +208,32 @@ def goalSelection():
         print("[INFO] A valid material path couldn't be detected, falling back to manual selection.")
         return manualGoalSelection() 
 
-## System for promting the user with a window in which the desired render engine can be selected  
+## System for promting the user with a window in which the desired render engines can be selected, every selected renderer gets its own material from the same scan
 def renderHandler(renderer_names):
     
-    render_selection = hou.ui.selectFromList(renderer_names, exclusive=True, title=("Render Handler"), message=("For which renderer should the material be created?"), column_header="Renderers", width=500, height=200)
+    render_selection = hou.ui.selectFromList(renderer_names, exclusive=False, title=("Render Handler"), message=("For which renderers should the material be created?"), column_header="Renderers", width=500, height=200)
     
     if len(render_selection) == 0:
         hou.ui.displayMessage("Script has been canceled.")
         exit()        
     else:
-        render_selection_name = renderer_names[render_selection[0]]
+        render_selection_names = [renderer_names[index] for index in render_selection]
     
-    print(f"[SUCCESS] A valid renderer has been selected: {render_selection_name}")          
-    return render_selection_name
+    print(f"[SUCCESS] Valid renderers have been selected: {render_selection_names}")          
+    return render_selection_names
 
 ## System for tech-checking the files from the getFolderInput() or getFileInput() function and creatig a metadata tuple for each file. Then combining all file tuples into a metadata_list    
 def techChecker(inputFiles,mode): 
 
     metadata_list = []
-    file_sets_list = []
 
     stats_fileProcessed = []
     stats_UDIMdetected = []
     stats_redirectedTextures = []
     stats_invalidFiles = []
+    stats_fuzzyMatches = {}
 
+    unknown_names = {}
     invalid_extensions = []
     invalid_textures = []
 
@@ -240,7 +318,10 @@ def techChecker(inputFiles,mode):
                     texture_set = file_name.replace(matching_substring,"").replace('--', '-').replace('__', '_').replace('_-_','-').replace('-_','_').replace('_-','_')
                     if texture_set.endswith("-") or texture_set.endswith("_"):
                         texture_set = texture_set[:-1]        
-                        file_sets_list.append(texture_set)                                              
+
+        ### The full name is kept for the typo tolerant pass, in case it gets simplified below
+        if texture_type == "Unknown":
+            unknown_names[file_path] = file_name
 
         ### Houdini does not like long node names, this simplifies the name of the node if the file name is over 70 characters
         if len(file_name) > 70:
@@ -258,8 +339,9 @@ def techChecker(inputFiles,mode):
     stats_hopelessTextures = []
     materialNames = []
 
-    ### Redirecting lost textures 
-    file_sets_list = list(set(file_sets_list))
+    ### Redirecting lost textures by the set names without their resolution suffix, extra maps of resolution packs (e.g. "Brick_spec" next to "Brick_2K_albedo") mostly come without one.
+    ### Every set found counts, the same rule classificationBatches() uses to keep lost textures in the batch of their set
+    file_sets_list = list(set(resolutionVariant(m[3])[1] for m in metadata_list if m[3] is not None))
 
     for m in metadata_list:
         file_path,file_name,texture_type,texture_set,file_extension = m
@@ -270,10 +352,27 @@ def techChecker(inputFiles,mode):
         # print(f"\t[DEBUG] Texture Set: {texture_set}")  
 
         if texture_type is "Unknown" and texture_set is None:
-            for tset in file_sets_list:
-                if tset in file_name:
-                    texture_set = tset
-                    stats_redirectedTextures.append(file_name+"."+file_extension)
+            ### The longest set wins, "Brick_35_spec" belongs to "Brick_35" and not to "Brick_3"
+            containing_sets = [tset for tset in file_sets_list if len(tset) > 0 and tset in file_name]
+            if len(containing_sets) > 0:
+                texture_set = max(containing_sets, key=lambda tset: (len(tset), tset))
+                stats_redirectedTextures.append(file_name+"."+file_extension)
+
+        ### Typo tolerant pass for the files that are still unknown, redirected files keep their texture set
+        if texture_type == "Unknown" and fuzzy_matching and file_path in unknown_names:
+            fuzzy_name = unknown_names[file_path]
+            ### Name parts of the texture set the file was redirected to are never taken for a texture type (e.g. "Light" of "Wall_Light" for "height").
+            ### Only that set counts, sets of other files may sit in another batch of the folder
+            known_tokens = set(re.findall(r"[^_\-.]+", texture_set.lower())) if texture_set is not None else set()
+            fuzzy_match = fuzzyMatch(fuzzy_name, known_tokens)
+            if fuzzy_match is not None:
+                texture_type, keyword, start_index, end_index, confidence = fuzzy_match
+                if texture_set is None:
+                    texture_set = textureSetCleanup(fuzzy_name[:start_index] + fuzzy_name[end_index:])
+                if file_name != fuzzy_name:
+                    file_name = texture_type
+                stats_fuzzyMatches[file_path] = (fuzzy_name[start_index:end_index], keyword, texture_type, confidence)
+
         if texture_type is "Unknown" and texture_set is None:
             stats_hopelessTextures.append(file_name+"."+file_extension)
 
@@ -282,12 +381,310 @@ def techChecker(inputFiles,mode):
             metadata = (file_path,file_name,texture_type,texture_set,file_extension)                    
             metadata_list_checked.append(metadata)
 
-    # if valid is True:
-    metadata_list_checked.append(metadata)                     
-    return list(set(metadata_list_checked)), set(list(materialNames)), stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, list(set(stats_redirectedTextures)), stats_hopelessTextures      
+    ### Merging sets that only differ by their resolution and keeping one variant per texture
+    metadata_list_checked, stats_resolutionAlternates = resolutionSelection(list(set(metadata_list_checked)))
+    materialNames = [m[3] for m in metadata_list_checked]
+
+    return metadata_list_checked, set(list(materialNames)), stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, list(set(stats_redirectedTextures)), stats_hopelessTextures, stats_resolutionAlternates, stats_fuzzyMatches      
+
+## System for cleaning up the separators that are left over after removing a part of a name
+def textureSetCleanup(name):
+    name = name.replace('--', '-').replace('__', '_').replace('_-_','-').replace('-_','_').replace('_-','_')
+    if name.endswith("-") or name.endswith("_"):
+        name = name[:-1]
+
+    return name
+
+## System for measuring the edit distance between two words (number of inserted, removed or replaced characters)
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j-1] + 1, previous[j-1] + (char_a != char_b)))
+        previous = current
+
+    return previous[-1]
+
+## System for counting the typos between two words, like levenshtein() but two swapped neighbouring letters count as a single typo
+def typoDistance(a, b):
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(previous[j] + 1, current[j-1] + 1, previous[j-1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j-2] and a[i-2] == char_b:
+                distance = min(distance, previous_previous[j-2] + 1)
+            current.append(distance)
+        previous_previous, previous = previous, current
+
+    return previous[-1]
+
+## System for adding a word to a BK-tree, every node is a [word, {distance: child node}] list
+def bkTreeInsert(tree, word):
+    if tree is None:
+        return [word, {}]
+
+    node = tree
+    while True:
+        distance = levenshtein(word, node[0])
+        if distance == 0:
+            return tree
+        if distance not in node[1]:
+            node[1][distance] = [word, {}]
+            return tree
+        node = node[1][distance]
+
+## System for finding every word of a BK-tree within max_distance of the given word. Only the branches that can hold a match are visited, so lookups stay cheap on big keyword tables
+def bkTreeSearch(tree, word, max_distance):
+    matches = []
+    candidates = [tree] if tree is not None else []
+    while len(candidates) > 0:
+        node = candidates.pop()
+        distance = levenshtein(word, node[0])
+        if distance <= max_distance:
+            matches.append((distance, node[0]))
+        for child_distance, child in node[1].items():
+            if distance - max_distance <= child_distance <= distance + max_distance:
+                candidates.append(child)
+
+    return matches
+
+## System for shortening a keyword the way texture names usually do, by dropping the vowels after the first letter (e.g. "normal" to "nrml", "roughness" to "rghnss")
+def keywordAbbreviation(keyword):
+    return keyword[0] + re.sub(r"[aeiou]", "", keyword[1:])
+
+## System for building the BK-tree over all keywords of supportedTextures_data and their abbreviations once. Abbreviations that collide with a keyword are left out
+def keywordIndex():
+    global keyword_index
+    if keyword_index is None:
+        tree = None
+        for texture_type, keywords in supportedTextures_data.items():
+            for keyword in keywords:
+                keyword_types[keyword.lower()] = texture_type
+                tree = bkTreeInsert(tree, keyword.lower())
+
+        for texture_type, keywords in supportedTextures_data.items():
+            for keyword in keywords:
+                abbreviation = keywordAbbreviation(keyword.lower())
+                if keyword.isalpha() and len(abbreviation) >= 3 and abbreviation not in keyword_types:
+                    keyword_types[abbreviation] = texture_type
+                    tree = bkTreeInsert(tree, abbreviation)
+        keyword_index = tree
+
+    return keyword_index
+
+## System for limiting the typos per keyword, short keywords like "ao" or "dx" would match almost anything otherwise
+def fuzzyAllowedDistance(keyword):
+    if len(keyword) <= 3:
+        return 0
+    if len(keyword) <= 5:
+        return min(1, fuzzy_max_distance)
+
+    return fuzzy_max_distance
+
+## System for finding the closest keyword for a single name part, cached because the same name parts (set names, common typos) show up in lots of files
+@functools.lru_cache(maxsize=65536)
+def fuzzyTokenMatch(token):
+    best_match = None
+    if len(token) < 3 or token.isdigit() or resolutionVariant(token)[0] is not None:
+        return best_match
+
+    for edit_distance, keyword in bkTreeSearch(keywordIndex(), token, fuzzy_max_distance):
+        ### Typos rarely hit the first letter, real words that only look like a keyword mostly differ there (e.g. "weight" and "height", "formal" and "normal")
+        if token[0] != keyword[0]:
+            continue
+
+        distance = typoDistance(token, keyword)
+        if distance > fuzzyAllowedDistance(keyword):
+            continue
+
+        confidence = round(1 - float(distance) / float(len(keyword)), 2)
+        if confidence < fuzzy_min_confidence:
+            continue
+        if best_match is None or confidence > best_match[1]:
+            best_match = (keyword, confidence)
+
+    return best_match
+
+## System for finding the closest keyword for the name parts of a file that didn't match exactly, name parts inside known_tokens are skipped. Returns the texture type, the keyword, the span of the matched name part and a confidence between 0 and 1
+def fuzzyMatch(file_name, known_tokens=()):
+    best_match = None
+    for token_match in re.finditer(r"[^_\-.]+", file_name.lower()):
+        if token_match.group() in known_tokens:
+            continue
+
+        token_result = fuzzyTokenMatch(token_match.group())
+        if token_result is None:
+            continue
+
+        keyword, confidence = token_result
+        if best_match is None or confidence > best_match[4]:
+            best_match = (keyword_types[keyword], keyword, token_match.start(), token_match.end(), confidence)
+
+    return best_match
+
+## System for finding a resolution suffix like "_2K" in a name, returns the resolution in K and the name without the suffix
+def resolutionVariant(name):
+    resolution_match = re.search(r"(^|_|-)(\d+)k(_|-|\.|$)", name.lower())
+    if resolution_match is None:
+        return None, name
+
+    start_index, end_index = resolution_match.span(2)
+    ### Prefixed resolutions ("2K_Brick") leave a separator at the start
+    base_name = textureSetCleanup(name[:start_index] + name[end_index+1:]).lstrip("_-")
+
+    return int(resolution_match.group(2)), base_name
+
+## System for picking one resolution out of the available ones based on resolution_policy
+def resolutionPick(resolutions):
+    if resolution_policy == "lowest":
+        return min(resolutions)
+    if resolution_policy == "max":
+        capped = [resolution for resolution in resolutions if resolution <= resolution_max]
+        if len(capped) == 0:
+            return min(resolutions)
+        return max(capped)
+
+    return max(resolutions)
+
+## System for merging texture sets that only differ by their resolution suffix. Only the variant picked by resolution_policy is kept for each texture, the others are returned as alternates keyed by the path of the kept file.
+## A set without any suffix next to suffixed ones (e.g. "Brick" next to "Brick_2K" and "Brick_4K") counts as the "original" variant, it is only picked if no suffixed variant exists for that texture
+def resolutionSelection(metadata_list):
+    set_resolutions = {}
+    unsuffixed_sets = []
+    for m in metadata_list:
+        file_path,file_name,texture_type,texture_set,file_extension = m
+        resolution, base_set = resolutionVariant(texture_set)
+        if resolution is not None:
+            set_resolutions.setdefault(base_set, set()).add(resolution)
+        else:
+            unsuffixed_sets.append(texture_set)
+
+    for texture_set in unsuffixed_sets:
+        if texture_set in set_resolutions:
+            set_resolutions[texture_set].add(None)
+
+    ### Sets with a single resolution are left untouched
+    metadata_list_selected = []
+    variants = {}
+    for m in metadata_list:
+        file_path,file_name,texture_type,texture_set,file_extension = m
+        resolution, base_set = resolutionVariant(texture_set)
+        if len(set_resolutions.get(base_set, [])) < 2:
+            metadata_list_selected.append(m)
+            continue
+
+        base_file_name = resolutionVariant(file_name)[1]
+        variants.setdefault((base_set, texture_type, base_file_name), []).append((resolution, m))
+
+    stats_resolutionAlternates = {}
+    for (base_set, texture_type, base_file_name), candidates in variants.items():
+        resolutions = [resolution for resolution, m in candidates if resolution is not None]
+        picked_resolution = resolutionPick(resolutions) if len(resolutions) > 0 else None
+        ### Several files of the same texture and resolution (e.g. "Brick_2K_albedo" and "Brick-2K-albedo") are picked by their path, so the order of the files never matters
+        picked = min(m for resolution, m in candidates if resolution == picked_resolution)
+        file_path,file_name,texture_type,texture_set,file_extension = picked
+
+        metadata_list_selected.append((file_path,file_name,texture_type,base_set,file_extension))
+        alternates = sorted((f"{resolution}K" if resolution is not None else "original", m[0]) for resolution, m in candidates if m is not picked)
+        if len(alternates) > 0:
+            stats_resolutionAlternates[file_path] = alternates
+
+    return metadata_list_selected, stats_resolutionAlternates
     
+## System for finding the shared cache folder of PBR-Express, falls back to the system temp folder without a Houdini session
+def cacheFolder(*parts):
+    return os.path.join(os.getenv("HOUDINI_TEMP_DIR") or tempfile.gettempdir(), "PBR-Express", *parts)
+
+## System for listing the files behind a texture path, every tile for UDIM textures
+def textureTiles(file_path):
+    if "<UDIM>" not in file_path:
+        return [file_path]
+
+    return sorted(glob.glob(glob.escape(file_path).replace("<UDIM>", "[0-9][0-9][0-9][0-9]")))
+
+## System for finding the cache folder of a proxy texture. The folder is keyed by the path, modification time and size of every source file, so changed textures get new proxies
+def proxyCacheFolder(file_path):
+    cache_key = hashlib.sha1(str(proxy_scale).encode())
+    for tile in textureTiles(file_path):
+        tile_stat = os.stat(tile)
+        cache_key.update(f"|{tile}|{tile_stat.st_mtime_ns}|{tile_stat.st_size}".encode())
+
+    return cacheFolder("proxies", cache_key.hexdigest()[:16])
+
+## System for creating a single proxy tile with hoiiotool, written to a temporary file first so an interrupted run never leaves a broken proxy in the cache
+def proxyResize(hoiiotool, tile, proxy_tile):
+    temp_tile = os.path.join(os.path.dirname(proxy_tile), "tmp_" + os.path.basename(proxy_tile))
+    try:
+        result = subprocess.run([hoiiotool, tile, "--resize", f"{proxy_scale}%", "-o", temp_tile], capture_output=True)
+        if result.returncode == 0:
+            os.replace(temp_tile, proxy_tile)
+            return True
+    except OSError:
+        pass
+
+    ### A failed run must not leave its temporary file inside the cache
+    if os.path.isfile(temp_tile):
+        os.remove(temp_tile)
+    return False
+
+## System for finding hoiiotool, once per run. Returns None if it is missing
+def hoiiotoolPath():
+    hoiiotool = shutil.which("hoiiotool") or shutil.which(os.path.join(os.getenv("HFS", ""), "bin", "hoiiotool"))
+    if hoiiotool is None:
+        print("[ERROR] hoiiotool couldn't be found on the PATH or inside $HFS/bin, using the full resolution files instead.")
+
+    return hoiiotool
+
+## System for planning the proxy textures of all given texture paths. The proxy paths are known from the cache key before anything is generated, so the materials can be created right away.
+## Returns the proxy path for every texture and the tiles that still have to be generated with proxyWorker()
+def proxyPlanning(file_paths):
+    proxies = {}
+    jobs = []
+    stats_proxiesReused = 0
+
+    for file_path in set(file_paths):
+        tiles = textureTiles(file_path)
+        if len(tiles) == 0 or not all(os.path.isfile(tile) for tile in tiles):
+            continue
+
+        proxy_folder = proxyCacheFolder(file_path)
+        os.makedirs(proxy_folder, exist_ok=True)
+        proxies[file_path] = os.path.join(proxy_folder, os.path.basename(file_path))
+
+        for tile in tiles:
+            proxy_tile = os.path.join(proxy_folder, os.path.basename(tile))
+            if os.path.isfile(proxy_tile):
+                stats_proxiesReused += 1
+            else:
+                jobs.append((file_path, tile, proxy_tile))
+
+    print(f"[INFO] Generating {len(jobs)} proxy textures at {proxy_scale}%, {stats_proxiesReused} reused from cache...")
+
+    return proxies, jobs
+
+## System for generating a single proxy tile on a background thread, every hoiiotool call is its own process. The main thread gets told about failed proxies so it can switch those textures back to the full resolution file
+def proxyWorker(hoiiotool, file_path, tile, proxy_tile, pipeline_queue, canceled):
+    if not proxyResize(hoiiotool, tile, proxy_tile):
+        pipelinePut(pipeline_queue, canceled, ("proxy_failed", file_path))
+
+## System for turning a path into a double quoted hscript string, with forward slashes (os.path.join() builds the cache paths with backslashes on Windows) and escaped quotes and variables
+def hscriptPath(path):
+    path = path.replace("\\", "/").replace('"', '\\"').replace("$", "\\$").replace("`", "\\`")
+    return f'"{path}"'
+
+## System for setting the file of an image node. With a proxy, the "useproxy" toggle of the material switches between the proxy and the full resolution texture
+def textureFileParm(imageNode, file_path, proxies):
+    if proxies is None or file_path not in proxies:
+        imageNode.parm("file").set(file_path)
+    else:
+        imageNode.parm("file").set(f'`ifs(ch("../useproxy"), {hscriptPath(proxies[file_path])}, {hscriptPath(file_path)})`')
+        proxy_image_nodes.setdefault(file_path, []).append(imageNode)
+
 ## System for the actual node creation 
-def nodeCreation(renderer, goal, file_data, set):
+def nodeCreation(renderer, goal, file_data, set, proxies=None):
 
     # print(f"[INFO] Starting node creation for texture set: '{set}'.") 
     goalNode = hou.node(goal)
@@ -345,6 +742,8 @@ return r'''
         parameters.append(newParam_uvRotate)
         parameters.append(newParam_separator)
         parameters.append(newParam_displacement)
+        if proxies is not None:
+            parameters.append(hou.ToggleParmTemplate("useproxy", "Use Proxy Textures", default_value=True))
         
         goalNode.setParmTemplateGroup(parameters)     
 
@@ -404,7 +803,7 @@ return r'''
             
             ### Bulk actions like creating multiple texture nodes, connecting to UV Nodes
             MTLX_Image_Node = goalNode.createNode("mtlxtiledimage", f"{set}_{texture_type}")  
-            MTLX_Image_Node.parm("file").set(file_path)
+            textureFileParm(MTLX_Image_Node, file_path, proxies)
             
             MTLX_Image_Node.setNamedInput("texcoord", MTLX_UV_Place, "out")               
             
@@ -503,6 +902,9 @@ return r'''
         # parameters.append(newParam_uvRotate)
         # parameters.append(newParam_separator)
         # parameters.append(newParam_displacement)
+        ### Off by default, USD exported from these materials has to point at the full resolution textures and not into the proxy cache
+        if proxies is not None:
+            parameters.append(hou.ToggleParmTemplate("useproxy", "Use Proxy Textures", default_value=False))
         
         goalNode.setParmTemplateGroup(parameters)     
 
@@ -572,10 +974,10 @@ return r'''
             
             ### Bulk actions like creating multiple texture nodes, connecting to UV Nodes
             MTLX_Image_Node = goalNode.createNode("mtlximage", f"{set}_{texture_type}")  
-            MTLX_Image_Node.parm("file").set(file_path)       
+            textureFileParm(MTLX_Image_Node, file_path, proxies)       
 
             USD_Image_Node = goalNode.createNode("usduvtexture", f"{set}_USD_{texture_type}")
-            USD_Image_Node.parm("file").set(file_path)  
+            textureFileParm(USD_Image_Node, file_path, proxies)  
 
             USD_Image_Node.setInput(1,USD_UV_Attrib,0)                
 
@@ -676,10 +1078,668 @@ return r'''
 
 
 
+## System for splitting the texture data into groups with the material name as the name of the group
+def textureSetGrouping(data):
+    materialData = {}
+    for metadata in data:
+        file_path,file_name,texture_type,texture_set,file_extension = metadata
+        if texture_set not in materialData:
+            materialData[texture_set] = []
+        materialData[texture_set].append(metadata)
+
+    return materialData
+
+## System for turning texture set names into names that are valid inside MaterialX documents and USD layers
+def validIdentifier(name):
+    identifier = re.sub(r"[^A-Za-z0-9_]", "_", name)
+    if len(identifier) == 0 or identifier[0].isdigit():
+        identifier = "_" + identifier
+
+    return identifier
+
+## System for finding a file name for a texture set of the direct file export that no other texture set of this run uses. Sets with the same name from different folders, or names that only differ by symbols (e.g. "a-b" and "a_b"), get a numeric suffix
+def libraryName(set, folder):
+    base_name = validIdentifier(set)
+    with library_names_lock:
+        name = base_name
+        suffix = 1
+        while name in library_names:
+            suffix += 1
+            name = f"{base_name}_{suffix}"
+        library_names.add(name)
+
+    if name != base_name:
+        print(f"[INFO] Texture set '{set}' from '{folder}' has the same library name as another texture set and is written as '{name}' instead.")
+
+    return name
+
+## System for making the texture paths of the direct file export absolute, the written files don't live next to the textures
+def libraryTexturePath(file_path):
+    return os.path.abspath(os.path.expandvars(file_path))
+
+## System for writing a standard surface MaterialX document for a texture set, following the same wiring as the "MaterialX" preset in nodeCreation()
+def writeMaterialX(file_data, set, output_dir):
+    name = validIdentifier(set)
+    image_nodes = {}
+
+    ### Image signature and standard surface input for each texture type, types without an input are wired by hand below
+    mtlx_wiring = {
+        "DIFFUSE":      ("color3", None),
+        "AO":           ("float", None),
+        "DISP":         ("float", None),
+        "NORMAL":       ("vector3", None),
+        "ROUGH":        ("float", "specular_roughness"),
+        "METALLIC":     ("float", "metalness"),
+        "OPACITY":      ("color3", "opacity"),
+        "EMISSION":     ("float", "emission"),
+        "REFRACTION":   ("float", "transmission"),
+        "SSS":          ("float", "subsurface"),
+    }
+    surface_inputs = []
+
+    document = ET.Element("materialx", version="1.38")
+
+    ### UV controls
+    MTLX_UV_Attrib = ET.SubElement(document, "geompropvalue", name="UVAttrib", type="vector2")
+    ET.SubElement(MTLX_UV_Attrib, "input", name="geomprop", type="string", value="uv")
+
+    MTLX_UV_Place = ET.SubElement(document, "place2d", name="UVControl", type="vector2")
+    ET.SubElement(MTLX_UV_Place, "input", name="texcoord", type="vector2", nodename="UVAttrib")
+
+    for index, metadata in enumerate(file_data):
+        file_path,file_name,texture_type,texture_set,file_extension = metadata
+        signature, surface_input = mtlx_wiring.get(texture_type, ("color3", None))
+
+        ### Bulk actions like creating multiple texture nodes, connecting to UV Nodes
+        image_name = validIdentifier(f"{set}_{texture_type}")
+        if image_name in image_nodes.values():
+            image_name = f"{image_name}{index}"
+
+        MTLX_Image_Node = ET.SubElement(document, "tiledimage", name=image_name, type=signature)
+        ET.SubElement(MTLX_Image_Node, "input", name="file", type="filename", value=libraryTexturePath(file_path))
+        ET.SubElement(MTLX_Image_Node, "input", name="texcoord", type="vector2", nodename="UVControl")
+
+        image_nodes[texture_type] = image_name
+        if surface_input is not None:
+            surface_inputs.append((surface_input, signature, image_name))
+
+    ### Nodes that are only needed when their texture types are there
+    if "DIFFUSE" in image_nodes or "AO" in image_nodes:
+        MTLX_multiply = ET.SubElement(document, "multiply", name="multiply", type="color3")
+        if "DIFFUSE" in image_nodes:
+            ET.SubElement(MTLX_multiply, "input", name="in1", type="color3", nodename=image_nodes["DIFFUSE"])
+        if "AO" in image_nodes:
+            ET.SubElement(MTLX_multiply, "input", name="in2", type="float", nodename=image_nodes["AO"])
+        surface_inputs.append(("base_color", "color3", "multiply"))
+
+    if "NORMAL" in image_nodes:
+        MTLX_normal = ET.SubElement(document, "normalmap", name="normalmap", type="vector3")
+        ET.SubElement(MTLX_normal, "input", name="in", type="vector3", nodename=image_nodes["NORMAL"])
+        surface_inputs.append(("normal", "vector3", "normalmap"))
+
+    if "DISP" in image_nodes:
+        MTLX_remap_disp = ET.SubElement(document, "remap", name="remap", type="float")
+        ET.SubElement(MTLX_remap_disp, "input", name="in", type="float", nodename=image_nodes["DISP"])
+        ET.SubElement(MTLX_remap_disp, "input", name="outlow", type="float", value="-0.5")
+        ET.SubElement(MTLX_remap_disp, "input", name="outhigh", type="float", value="0.5")
+
+        MTLX_disp = ET.SubElement(document, "displacement", name="displacement", type="displacementshader")
+        ET.SubElement(MTLX_disp, "input", name="displacement", type="float", nodename="remap")
+        ET.SubElement(MTLX_disp, "input", name="scale", type="float", value="0.05")
+
+    ### Create material
+    MTLX_StSf_Node = ET.SubElement(document, "standard_surface", name=f"{name}_surface", type="surfaceshader")
+    for surface_input, signature, node_name in surface_inputs:
+        ET.SubElement(MTLX_StSf_Node, "input", name=surface_input, type=signature, nodename=node_name)
+
+    MTLX_material = ET.SubElement(document, "surfacematerial", name=name, type="material")
+    ET.SubElement(MTLX_material, "input", name="surfaceshader", type="surfaceshader", nodename=f"{name}_surface")
+    if "DISP" in image_nodes:
+        ET.SubElement(MTLX_material, "input", name="displacementshader", type="displacementshader", nodename="displacement")
+
+    mtlx_path = os.path.join(output_dir, f"{name}.mtlx")
+    ET.indent(document)
+    ET.ElementTree(document).write(mtlx_path, encoding="utf-8", xml_declaration=True)
+
+    return mtlx_path
+
+## System for writing a .usda layer with a UsdPreviewSurface fallback for a texture set, following the same wiring as the "MaterialX (USD export optimized)" preset in nodeCreation()
+def writeUSDA(file_data, set, output_dir):
+    name = validIdentifier(set)
+    prim_path = f"/materials/{name}"
+
+    ### Value type, UsdPreviewSurface input and texture output for each texture type
+    usd_wiring = {
+        "DIFFUSE":      ("color3f", "diffuseColor", "rgb"),
+        "AO":           ("float", "occlusion", "r"),
+        "NORMAL":       ("normal3f", "normal", "rgb"),
+        "ROUGH":        ("float", "roughness", "r"),
+        "METALLIC":     ("float", "metallic", "r"),
+        "OPACITY":      ("float", "opacity", "r"),
+        "EMISSION":     ("color3f", "emissiveColor", "rgb"),
+    }
+    surface_inputs = {}
+    texture_shaders = []
+
+    for index, metadata in enumerate(file_data):
+        file_path,file_name,texture_type,texture_set,file_extension = metadata
+
+        texture_name = validIdentifier(f"{set}_USD_{texture_type}")
+        if texture_name in [shader_name for shader_name, shader_file in texture_shaders]:
+            texture_name = f"{texture_name}{index}"
+        texture_shaders.append((texture_name, libraryTexturePath(file_path)))
+
+        if texture_type in usd_wiring:
+            value_type, surface_input, texture_output = usd_wiring[texture_type]
+            surface_inputs[surface_input] = f"{value_type} inputs:{surface_input}.connect = <{prim_path}/{texture_name}.outputs:{texture_output}>"
+
+    lines = [
+        "#usda 1.0",
+        "(",
+        '    defaultPrim = "materials"',
+        ")",
+        "",
+        'def Scope "materials"',
+        "{",
+        f'    def Material "{name}" (',
+        f"        prepend references = @./{name}.mtlx@</MaterialX/Materials/{name}>",
+        "    )",
+        "    {",
+        f"        token outputs:surface.connect = <{prim_path}/{name}_USD.outputs:surface>",
+        "",
+        f'        def Shader "{name}_USD"',
+        "        {",
+        '            uniform token info:id = "UsdPreviewSurface"',
+    ]
+    for surface_input in surface_inputs.values():
+        lines.append(f"            {surface_input}")
+    lines += [
+        "            token outputs:surface",
+        "        }",
+        "",
+        '        def Shader "UVAttrib"',
+        "        {",
+        '            uniform token info:id = "UsdPrimvarReader_float2"',
+        '            string inputs:varname = "st"',
+        "            float2 outputs:result",
+        "        }",
+    ]
+    for texture_name, file_path in texture_shaders:
+        lines += [
+            "",
+            f'        def Shader "{texture_name}"',
+            "        {",
+            '            uniform token info:id = "UsdUVTexture"',
+            f"            asset inputs:file = @{file_path}@",
+            f"            float2 inputs:st.connect = <{prim_path}/UVAttrib.outputs:result>",
+            "            float outputs:r",
+            "            float3 outputs:rgb",
+            "        }",
+        ]
+    lines += [
+        "    }",
+        "}",
+        "",
+    ]
+
+    usda_path = os.path.join(output_dir, f"{name}.usda")
+    with open(usda_path, "w") as file:
+        file.write("\n".join(lines))
+
+    return usda_path
+
+## System for writing the .mtlx and .usda files of many texture sets on the given executor, without creating any nodes (never touches hou, so it also runs without a Houdini session).
+## The file names are reserved right away, so the paths are returned together with the futures of the writes
+def libraryExport(materialData, output_dir, executor):
+    os.makedirs(output_dir, exist_ok=True)
+
+    library_files = {}
+    futures = []
+    for materialName, materialFiles in materialData.items():
+        name = libraryName(materialName, os.path.dirname(materialFiles[0][0]))
+        futures.append(executor.submit(writeMaterialX, materialFiles, name, output_dir))
+        futures.append(executor.submit(writeUSDA, materialFiles, name, output_dir))
+        library_files[materialName] = (os.path.join(output_dir, f"{name}.mtlx"), os.path.join(output_dir, f"{name}.usda"))
+
+    return library_files, futures
+
+## System for writing the library layer that sublayers the material layers written in this run, older layers inside the output folder are left out
+def writeLibraryLayer(output_dir, usda_paths):
+    os.makedirs(output_dir, exist_ok=True)
+    library_path = os.path.join(output_dir, "PBR-Express_library.usda")
+    material_layers = sorted(os.path.basename(usda_path) for usda_path in usda_paths)
+
+    lines = [
+        "#usda 1.0",
+        "(",
+        '    defaultPrim = "materials"',
+        "    subLayers = [",
+    ]
+    for layer in material_layers:
+        lines.append(f"        @./{layer}@,")
+    lines += [
+        "    ]",
+        ")",
+        "",
+    ]
+
+    with open(library_path, "w") as file:
+        file.write("\n".join(lines))
+
+    return library_path
+
+## System for prompting the user with a folder chooser dialog for the output of the direct file export
+def getLibraryOutput():
+    userLibraryOutput = hou.ui.selectFile(title=("Choose the folder the material library will be written to."), file_type=hou.fileType.Directory)
+    if len(userLibraryOutput) == 0:
+        print(f"[INFO] Script has been canceled.")
+        exit()
+
+    userLibraryOutput = hou.text.expandString(userLibraryOutput)
+    print(f"[SUCCESS] A valid library folder has been selected: {userLibraryOutput}")
+    return userLibraryOutput
+
+## System for writing the content of a created material to the log file
+def logMaterial(log_path, materialName, createdMaterials, materialFiles, resolutionAlternates, fuzzyMatches):
+    with open(log_path, "a") as file:
+        file.write(f"\n\n\n- Material: {materialName}")
+        for renderer, createdMaterial_name in createdMaterials:
+            file.write(f"\n\tCreated for '{renderer}': {createdMaterial_name}")
+        file.write("\n")
+        for metadata in materialFiles:
+            file_path,file_name,texture_type,texture_set,file_extension = metadata
+            file.write(f"\n\tFile Path: {file_path}\n")
+            file.write(f"\tFile Name: {file_name}\n")
+            file.write(f"\tFile Extension: {file_extension}\n") 
+            file.write(f"\tTexture Type: {texture_type}\n")
+            file.write(f"\tTexture Set: {texture_set}\n")                  
+            if file_path in fuzzyMatches:
+                token, keyword, fuzzy_type, confidence = fuzzyMatches[file_path]
+                file.write(f"\tFuzzy Match: '{token}' ~ '{keyword}' (confidence {confidence})\n")
+            for resolution, alternate_path in resolutionAlternates.get(file_path, []):
+                file.write(f"\tAlternate ({resolution}): {alternate_path}\n")
+
+## System for storing the unused resolution variants on the created material as user data, so they can be switched to later.
+## Variants that are still inside a zip archive are listed with their path inside the cache, the "Extract Resolution Alternates" button on the material extracts them there on demand
+def storeResolutionAlternates(createdMaterial, materialFiles, resolutionAlternates, archiveAlternates):
+    alternates = []
+    archive_members = []
+    for metadata in materialFiles:
+        file_path,file_name,texture_type,texture_set,file_extension = metadata
+        for resolution, alternate_path in resolutionAlternates.get(file_path, []):
+            alternates.append(f"{texture_type} {resolution}: {alternate_path}")
+            for target_path, archive_path, member in archiveAlternates.get(alternate_path, []):
+                archive_members.append(f"{target_path}\t{archive_path}\t{member}")
+
+    if len(alternates) > 0:
+        createdMaterial.setUserData("PBR-Express_alternates", "\n".join(alternates))
+
+    if len(archive_members) > 0:
+        createdMaterial.setUserData("PBR-Express_archive_alternates", "\n".join(archive_members))
+        parameters = createdMaterial.parmTemplateGroup()
+        parameters.append(hou.ButtonParmTemplate("extractalternates", "Extract Resolution Alternates", script_callback=archive_alternates_callback, script_callback_language=hou.scriptLanguage.Python))
+        createdMaterial.setParmTemplateGroup(parameters)
+
+## System for storing the textures recognized by the typo tolerant pass on the created material as user data, with the matched name part, keyword and confidence
+def storeFuzzyMatches(createdMaterial, materialFiles, fuzzyMatches):
+    matches = []
+    for metadata in materialFiles:
+        file_path,file_name,texture_type,texture_set,file_extension = metadata
+        if file_path in fuzzyMatches:
+            token, keyword, fuzzy_type, confidence = fuzzyMatches[file_path]
+            matches.append(f"{texture_type} {confidence}: {file_path} ('{token}' ~ '{keyword}')")
+
+    if len(matches) > 0:
+        createdMaterial.setUserData("PBR-Express_fuzzy_matches", "\n".join(matches))
+
+## System for checking if a path points into a zip archive, e.g. "/textures/pack.zip/maps/wood_albedo.png". Returns the archive and the member path
+def archiveSplit(file_path):
+    archive_match = re.match(r"^(.*?\.zip)/(.+)$", file_path, re.IGNORECASE)
+    if archive_match is None:
+        return None, None
+
+    return archive_match.group(1), archive_match.group(2)
+
+## System for listing the files inside a zip archive from its central directory, nothing gets extracted. Yields one unit of work per folder inside the archive
+def archiveUnits(archive_path):
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            ### Archives built on macOS carry "__MACOSX/._*" resource forks next to every file, those are no textures
+            members = [info.filename for info in archive.infolist() if not info.is_dir() and not info.filename.startswith("__MACOSX/") and not os.path.basename(info.filename).startswith("._")]
+    except (OSError, zipfile.BadZipFile) as error:
+        print(f"[ERROR] Archive couldn't be read and will be ignored: {archive_path} ({error})")
+        return
+
+    folders = {}
+    for member in members:
+        folders.setdefault(member.rpartition("/")[0], []).append(f"{archive_path}/{member}")
+
+    for folder_files in folders.values():
+        yield folder_files
+
+## System for finding the members of a texture inside a zip archive (every tile for UDIM textures) and the cache folder they get extracted to.
+## The cache folder is keyed by the CRC and size of the members as listed in the central directory, so the same content is only extracted once, no matter which archive or import it comes from
+def archiveCacheFolder(archive, member_path):
+    if "<UDIM>" in member_path:
+        tile_pattern = re.compile(re.escape(member_path).replace(re.escape("<UDIM>"), r"\d{4}") + "$")
+        members = [info for info in archive.infolist() if tile_pattern.match(info.filename)]
+    else:
+        members = [archive.getinfo(member_path)]
+
+    cache_key = hashlib.sha1()
+    for info in sorted(members, key=lambda info: info.filename):
+        cache_key.update(f"|{os.path.basename(info.filename)}|{info.CRC:08x}|{info.file_size}".encode())
+
+    return members, cacheFolder("archives", cache_key.hexdigest()[:16])
+
+## System for extracting a single texture (every tile for UDIM textures) out of a zip archive into the shared cache.
+## Members that can't be extracted (encrypted, unsupported compression, corrupted data) are logged and the texture is skipped, the path is None then
+def archiveExtract(archive, member_path):
+    members, extract_folder = archiveCacheFolder(archive, member_path)
+    os.makedirs(extract_folder, exist_ok=True)
+
+    extracted = 0
+    reused = 0
+    for info in members:
+        target_path = os.path.join(extract_folder, os.path.basename(info.filename))
+        if os.path.isfile(target_path):
+            reused += 1
+            continue
+
+        ### Streamed into a temporary file first so an interrupted run never leaves a broken file in the cache
+        temp_handle, temp_path = tempfile.mkstemp(dir=extract_folder)
+        try:
+            with archive.open(info) as source, os.fdopen(temp_handle, "wb") as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+        except (OSError, RuntimeError, NotImplementedError, EOFError, zipfile.BadZipFile, zlib.error) as error:
+            os.remove(temp_path)
+            print(f"[ERROR] Archive member couldn't be extracted and will be ignored: {archive.filename}/{info.filename} ({error})")
+            return None, extracted, reused
+        os.replace(temp_path, target_path)
+        extracted += 1
+
+    return os.path.join(extract_folder, os.path.basename(member_path)), extracted, reused
+
+## System for opening an archive once per extraction, an archive that can't be opened anymore is logged once and stays None
+def archiveOpen(archives, archive_path):
+    if archive_path not in archives:
+        try:
+            archives[archive_path] = zipfile.ZipFile(archive_path)
+        except (OSError, zipfile.BadZipFile) as error:
+            print(f"[ERROR] Archive couldn't be read and will be ignored: {archive_path} ({error})")
+            archives[archive_path] = None
+
+    return archives[archive_path]
+
+## System for extracting the textures of the classified metadata that live inside zip archives, every archive is only opened once. Their resolution alternates are not extracted, they get the path they will have inside the cache.
+## Returns the metadata with the paths into the cache, the mapping from archive path to cache path, the alternates with their cache paths and the archive members behind every alternate that isn't extracted yet
+def archiveExtraction(metadata_list, resolutionAlternates):
+    archive_paths = {}
+    archives = {}
+    stats_extracted = 0
+    stats_reused = 0
+
+    metadata_list_extracted = []
+    resolutionAlternates_extracted = {}
+    archiveAlternates = {}
+    try:
+        for metadata in metadata_list:
+            file_path,file_name,texture_type,texture_set,file_extension = metadata
+            archive_path, member_path = archiveSplit(file_path)
+            if archive_path is not None:
+                if file_path not in archive_paths:
+                    archive = archiveOpen(archives, archive_path)
+                    archive_paths[file_path] = None
+                    if archive is not None:
+                        archive_paths[file_path], extracted, reused = archiveExtract(archive, member_path)
+                        stats_extracted += extracted
+                        stats_reused += reused
+                file_path = archive_paths[file_path]
+                if file_path is None:
+                    continue
+
+            metadata_list_extracted.append((file_path,file_name,texture_type,texture_set,file_extension))
+
+        for file_path, alternates in resolutionAlternates.items():
+            alternates_extracted = []
+            for resolution, alternate_path in alternates:
+                archive_path, member_path = archiveSplit(alternate_path)
+                if archive_path is not None:
+                    archive = archiveOpen(archives, archive_path)
+                    if archive is None:
+                        continue
+                    members, extract_folder = archiveCacheFolder(archive, member_path)
+                    alternate_path = os.path.join(extract_folder, os.path.basename(member_path))
+                    archiveAlternates[alternate_path] = [(os.path.join(extract_folder, os.path.basename(info.filename)), archive_path, info.filename) for info in members if not os.path.isfile(os.path.join(extract_folder, os.path.basename(info.filename)))]
+                alternates_extracted.append((resolution, alternate_path))
+            if archive_paths.get(file_path, file_path) is not None:
+                resolutionAlternates_extracted[archive_paths.get(file_path, file_path)] = alternates_extracted
+    finally:
+        for archive in archives.values():
+            if archive is not None:
+                archive.close()
+
+    if len(archive_paths) > 0:
+        print(f"[INFO] Extracted {stats_extracted} files from archives, {stats_reused} reused from cache...")
+
+    return metadata_list_extracted, archive_paths, resolutionAlternates_extracted, archiveAlternates
+
+## System for guessing the texture set a file ends up in without classifying it, using the same longest keyword rule as techChecker() in a single regex pass. Resolution suffixes are dropped, so all variants of a set get the same name. Returns None for files without any keyword
+def batchSetName(file, keyword_pattern, keyword_ranks):
+    file_name = re.sub(r"\.(<UDIM>|\$F|1\d{3})$", "", file.rpartition("/")[2].rpartition(".")[0])
+    file_name = re.sub(r"[ ()\[\]{}%^&*]", "_", file_name)
+
+    matching = [keyword_match.group(2) for keyword_match in keyword_pattern.finditer(file_name.lower())]
+    if len(matching) == 0:
+        return None
+
+    value = max(matching, key=lambda keyword: (len(keyword), -keyword_ranks[keyword]))
+    start_index = file_name.lower().find(value)
+    texture_set = textureSetCleanup(file_name.replace(file_name[start_index:start_index + len(value)], ""))
+
+    return resolutionVariant(texture_set)[1]
+
+## System for splitting the files of a big folder into batches of about classification_batch_size files for the classification workers. Every texture set (with all of its resolution variants) stays inside one batch,
+## files without a keyword go into the batch of the texture set their name contains (like the redirect in techChecker()), the rest into a batch of their own
+def classificationBatches(files):
+    if len(files) <= classification_batch_size:
+        return [files]
+
+    keyword_ranks = {}
+    for key, values in supportedTextures_data.items():
+        for value in values:
+            keyword_ranks.setdefault(value, len(keyword_ranks))
+    keyword_pattern = re.compile(r"(^|_|-)(" + "|".join(re.escape(value) for value in sorted(keyword_ranks, key=len, reverse=True)) + r")(?=_|-|\.|$)")
+
+    groups = {}
+    leftovers = []
+    for file in files:
+        texture_set = batchSetName(file, keyword_pattern, keyword_ranks)
+        if texture_set is None:
+            leftovers.append(file)
+        else:
+            groups.setdefault(texture_set, []).append(file)
+
+    ### Matching lots of files without keywords against lots of sets costs more than batching saves
+    if len(leftovers) * len(groups) > 1000000:
+        return [files]
+
+    unmatched = []
+    for file in leftovers:
+        file_name = file.rpartition("/")[2]
+        containing = [texture_set for texture_set in groups if len(texture_set) > 0 and texture_set in file_name]
+        if len(containing) > 0:
+            groups[max(containing, key=lambda texture_set: (len(texture_set), texture_set))].append(file)
+        else:
+            unmatched.append(file)
+
+    batches = [[]]
+    for group_files in groups.values():
+        if len(batches[-1]) >= classification_batch_size:
+            batches.append([])
+        batches[-1] += group_files
+    if len(unmatched) > 0:
+        batches.append(unmatched)
+
+    return [batch for batch in batches if len(batch) > 0]
+
+## System for splitting an input into units of work for the classification workers, one unit per folder (or per batch of a big folder) so the files of a texture set stay together. Zip archives are listed like folders
+def scanUnits(inputFiles, mode):
+    if mode == "File":
+        image_files = [file for file in inputFiles if not file.lower().endswith(".zip")]
+        if len(image_files) > 0:
+            yield from classificationBatches(image_files)
+        for file in inputFiles:
+            if file.lower().endswith(".zip"):
+                for archive_files in archiveUnits(file):
+                    yield from classificationBatches(archive_files)
+        return
+
+    for root, dirs, files in os.walk(inputFiles):
+        image_files = [root.rstrip("/") + "/" + file for file in files if not file.lower().endswith(".zip")]
+        if len(image_files) > 0:
+            yield from classificationBatches(image_files)
+        for file in files:
+            if file.lower().endswith(".zip"):
+                for archive_files in archiveUnits(root.rstrip("/") + "/" + file):
+                    yield from classificationBatches(archive_files)
+
+## System for putting a message into the pipeline queue, gives up once the pipeline has been canceled so no worker waits forever on a full queue
+def pipelinePut(pipeline_queue, canceled, message):
+    while not canceled.is_set():
+        try:
+            pipeline_queue.put(message, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+## System for classifying one unit of work on a background thread. Everything that doesn't need hou (classification, archive extraction) happens here, then the completed texture sets are queued for the main thread right away.
+## Proxies and library files are only planned here, generating and writing them runs on the background executors while the main thread creates the materials
+def classificationWorker(unit, library_output, hoiiotool, proxy_executor, export_executor, background_futures, pipeline_queue, canceled):
+    data, materialNames, stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, stats_redirectedTextures, stats_hopelessTextures, stats_resolutionAlternates, stats_fuzzyMatches = techChecker(unit, "File")
+
+    ### Only the textures that ended up in a material get extracted from archives, their resolution alternates only on demand
+    data, archive_paths, stats_resolutionAlternates, stats_archiveAlternates = archiveExtraction(data, stats_resolutionAlternates)
+    if len(archive_paths) > 0:
+        stats_fuzzyMatches = {archive_paths.get(file_path, file_path): fuzzy_match for file_path, fuzzy_match in stats_fuzzyMatches.items() if archive_paths.get(file_path, file_path) is not None}
+
+    materialData = textureSetGrouping(data)
+
+    proxies = None
+    if proxy_executor is not None and len(materialData) > 0:
+        proxies, jobs = proxyPlanning([metadata[0] for metadata in data])
+        for file_path, tile, proxy_tile in jobs:
+            background_futures.append(proxy_executor.submit(proxyWorker, hoiiotool, file_path, tile, proxy_tile, pipeline_queue, canceled))
+
+    library_files = {}
+    if export_executor is not None and len(materialData) > 0:
+        library_files, futures = libraryExport(materialData, library_output, export_executor)
+        background_futures.extend(futures)
+
+    stats = (materialNames, stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, stats_redirectedTextures, stats_hopelessTextures, stats_resolutionAlternates, stats_fuzzyMatches)
+    if not pipelinePut(pipeline_queue, canceled, ("stats", stats)):
+        return
+
+    for materialName, materialFiles in materialData.items():
+        if not pipelinePut(pipeline_queue, canceled, ("set", materialName, materialFiles, stats_resolutionAlternates, stats_fuzzyMatches, stats_archiveAlternates, proxies, library_files.get(materialName))):
+            return
+
+## System for running the scan and classification of all inputs on background threads while the caller creates the materials.
+## Yields ("scanned", number of files), ("stats", techChecker() stats of a unit), ("set", materialName, materialFiles, resolutionAlternates, fuzzyMatches, archiveAlternates, proxies, library_files) and ("proxy_failed", file_path) messages as soon as they are ready.
+## The queue is bounded, so the workers never run too far ahead of the node creation. Only the thread iterating over this touches hou, the pipeline ends once every proxy and library file is written
+def texturePipeline(inputs, mode, library_output=None, with_proxies=False):
+    pipeline_queue = queue.Queue(maxsize=pipeline_queue_size)
+    canceled = threading.Event()
+
+    ### Without hoiiotool no proxies are planned at all, the materials then get no "Use Proxy Textures" toggle
+    hoiiotool = hoiiotoolPath() if with_proxies else None
+    if hoiiotool is None:
+        with_proxies = False
+
+    def producer():
+        background_futures = []
+        proxy_executor = concurrent.futures.ThreadPoolExecutor(max_workers=proxy_workers) if with_proxies else None
+        export_executor = concurrent.futures.ThreadPoolExecutor(max_workers=library_export_workers) if library_output is not None else None
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=classification_workers) as executor:
+                futures = []
+                for inputFiles in inputs:
+                    for unit in scanUnits(inputFiles, mode):
+                        if not pipelinePut(pipeline_queue, canceled, ("scanned", len(unit))):
+                            executor.shutdown(cancel_futures=True)
+                            return
+                        futures.append(executor.submit(classificationWorker, unit, library_output, hoiiotool, proxy_executor, export_executor, background_futures, pipeline_queue, canceled))
+
+                for future in futures:
+                    future.result()
+
+            for future in background_futures:
+                future.result()
+        except Exception as error:
+            pipelinePut(pipeline_queue, canceled, ("error", error))
+        finally:
+            for background_executor in (proxy_executor, export_executor):
+                if background_executor is not None:
+                    background_executor.shutdown(cancel_futures=canceled.is_set())
+        pipelinePut(pipeline_queue, canceled, None)
+
+    producer_thread = threading.Thread(target=producer, daemon=True)
+    producer_thread.start()
+
+    try:
+        while True:
+            message = pipeline_queue.get()
+            if message is None:
+                return
+            if message[0] == "error":
+                raise message[1]
+            yield message
+    finally:
+        canceled.set()
+
+## System for running the direct file export from a plain Python interpreter, for machines without a Houdini session or license
+def headlessLibraryExport():
+    parser = argparse.ArgumentParser(prog="PBR-Express", description="Writes a MaterialX + USD material library for every texture set inside the given folders, without creating any Houdini nodes.")
+    parser.add_argument("folders", nargs="+", help="Folders containing your materials.")
+    parser.add_argument("-o", "--output", required=True, help="Folder the .mtlx and .usda files will be written to.")
+    args = parser.parse_args()
+
+    stats_fileProcessed = 0
+    stats_materialsExported = 0
+    usda_paths = []
+
+    print(f"[INFO] Start tech-checking files, {len(args.folders)} directory to check...")
+    for message in texturePipeline([os.path.join(folder, "") for folder in args.folders], "Folder", args.output):
+        if message[0] == "stats":
+            materialNames, fileProcessed, invalidFiles, UDIMdetected, redirectedTextures, hopelessTextures, resolutionAlternates, fuzzyMatches = message[1]
+            stats_fileProcessed += len(fileProcessed)
+
+            if len(hopelessTextures) > 0:
+                print(f"[ERROR] Those files couldn't be associated with any texture sets and will be ignored: {hopelessTextures}")
+        elif message[0] == "set":
+            stats_materialsExported += 1
+            usda_paths.append(message[7][1])
+
+    library_path = writeLibraryLayer(args.output, usda_paths)
+
+    print(f"\n\t[STATS] Total files processed: {stats_fileProcessed}")
+    print(f"\t[STATS] Total materials exported: {stats_materialsExported}")
+    print(f"\n\tLibrary layer saved to: {library_path}")
+
 #   ---EXECUTE DEFINITIONS---                  
 print("------------------------------------------------")         
 print("[INFO] Starting PBR Express.") 
 
+## Without a Houdini session only the direct file export is available
+if hou is None:
+    headlessLibraryExport()
+    print("\n[INFO] Ending script.")
+    print("------------------------------------------------")
+    exit()
+
 ## Create empty variables
 list_stats_fileProcessed = []
 list_stats_invalidTextures = []
@@ -688,6 +1748,10 @@ list_stats_UDIMdetected = []
 list_stats_redirectedTextures = []
 list_stats_hopelessTextures = []
 list_stats_materialsCreated = []
+list_stats_resolutionAlternates = []
+list_stats_fuzzyMatches = []
+list_library_layers = []
+list_failed_proxies = []
 
 selection = hou.ui.displayMessage("Choose your mode:", buttons=("File select","Folder select", "Cancel"), close_choice=2, title="PBR-Express", details="Please refer to the documentation: https://github.com/CrisDoesCG/PBR-Express", details_label="Need help?", details_expanded=False)
 
@@ -706,8 +1770,15 @@ elif selection == 1:
     mode = "Folder"
     print(f"[INFO] Start tech-checking files, {len(input)} directory to check...")
 
-goal = goalSelection()
-renderer = renderHandler(supported_renderers)
+renderers = renderHandler(supported_renderers)
+node_renderers = [renderer for renderer in renderers if renderer != "MaterialX + USD library (direct file export)"]
+
+goal = None
+library_output = None
+if len(node_renderers) > 0:
+    goal = goalSelection()
+if "MaterialX + USD library (direct file export)" in renderers:
+    library_output = getLibraryOutput()
 
 ## Create .txt log file
 houdini_tmp = os.getenv("HOUDINI_TEMP_DIR")
@@ -723,58 +1794,92 @@ os.makedirs(log_dir, exist_ok=True)
 ## Write the string to the file
 with open(log_path, "w") as file:
     file.write("\n---------------------------------------------------\n\n")
-    file.write(f"Script is creating materials based on the preset '{renderer}' at '{goal}'...\n")    
+    for renderer in node_renderers:
+        file.write(f"Script is creating materials based on the preset '{renderer}' at '{goal}'...\n")    
+    if library_output is not None:
+        file.write(f"Script is writing a material library to '{library_output}'...\n")
     file.write("\n---------------------------------------------------\n\n")
     file.write("List of created materials and their content...")
 
 
 
 ## START MAIN LOOP
-for i in input:
-    data, materialNames, stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, stats_redirectedTextures, stats_hopelessTextures = techChecker(i,mode)
-    
-    invalid_textures, invalid_extensions = stats_invalidFiles
+### Scanning and classification run on background threads, materials are created here as soon as their texture set is ready
+stats_filesScanned = 0
+stats_filesClassified = 0
+stats_setsFound = 0
+stats_setsDone = 0
+
+### Proxy textures only work on the subnet based MaterialX presets
+with_proxies = generate_proxies and any(renderer != "Mantra" for renderer in node_renderers)
+
+with hou.InterruptableOperation(
+    "Creating textures...", "Executing PBR-Express...", open_interrupt_dialog=True) as operation:                
+    for message in texturePipeline(input, mode, library_output, with_proxies):
+        if message[0] == "scanned":
+            stats_filesScanned += message[1]
+            continue
 
-    list_stats_fileProcessed += stats_fileProcessed
-    list_stats_invalidTextures += stats_invalidFiles[0]
-    list_stats_invalidExtensions += stats_invalidFiles[1]
-    list_stats_UDIMdetected += stats_UDIMdetected
-    list_stats_redirectedTextures += stats_redirectedTextures
-    list_stats_hopelessTextures += stats_hopelessTextures
-    list_stats_materialsCreated += materialNames 
+        ### Textures whose proxy couldn't be generated go back to the full resolution file, on already created materials as well
+        if message[0] == "proxy_failed":
+            if message[1] not in list_failed_proxies:
+                list_failed_proxies.append(message[1])
+                print(f"[ERROR] Proxy texture couldn't be generated, using the full resolution file instead: {message[1]}")
+                for imageNode in proxy_image_nodes.pop(message[1], []):
+                    imageNode.parm("file").set(message[1])
+            continue
 
-    materialData = {}
+        if message[0] == "stats":
+            materialNames, stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, stats_redirectedTextures, stats_hopelessTextures, stats_resolutionAlternates, stats_fuzzyMatches = message[1]
+
+            list_stats_fileProcessed += stats_fileProcessed
+            list_stats_invalidTextures += stats_invalidFiles[0]
+            list_stats_invalidExtensions += stats_invalidFiles[1]
+            list_stats_UDIMdetected += stats_UDIMdetected
+            list_stats_redirectedTextures += stats_redirectedTextures
+            list_stats_hopelessTextures += stats_hopelessTextures
+            list_stats_materialsCreated += materialNames 
+            for alternates in stats_resolutionAlternates.values():
+                list_stats_resolutionAlternates += alternates
+            for file_path, (token, keyword, fuzzy_type, confidence) in stats_fuzzyMatches.items():
+                list_stats_fuzzyMatches.append(f"{file_path} -> {fuzzy_type} ('{token}' ~ '{keyword}', confidence {confidence})")
+
+            stats_filesClassified += len(stats_fileProcessed)
+            stats_setsFound += len(materialNames)
+
+        if message[0] == "set":
+            __message_type, materialName, materialFiles, stats_resolutionAlternates, stats_fuzzyMatches, stats_archiveAlternates, proxies, library_files = message
+            if proxies is not None:
+                proxies = {file_path: proxy_path for file_path, proxy_path in proxies.items() if file_path not in list_failed_proxies}
+
+            ### Every renderer works from the same classification, the created materials of all renderers are collected for the log
+            createdMaterials = []
+            if library_files is not None:
+                createdMaterials.append(("MaterialX + USD library (direct file export)", library_files[0]))
+                list_library_layers.append(library_files[1])
+
+            for renderer in node_renderers:
+                nodeName = materialName
+                if len(node_renderers) > 1:
+                    nodeName = f"{materialName}_{renderer_suffixes.get(renderer, validIdentifier(renderer))}"
+
+                createdMaterial = nodeCreation(renderer,goal,materialFiles,nodeName,proxies)  
+                createdMaterials.append((renderer, createdMaterial.name()))
+
+                storeResolutionAlternates(createdMaterial, materialFiles, stats_resolutionAlternates, stats_archiveAlternates)
+                storeFuzzyMatches(createdMaterial, materialFiles, stats_fuzzyMatches)
 
-    ### Split the texture data into groups with the material name as the name of the group
-    for metadata in data:
-        file_path,file_name,texture_type,texture_set,file_extension = metadata
-        if texture_set not in materialData:
-            materialData[texture_set] = []
-        materialData[texture_set].append(metadata) 
+            ### Wite to log file
+            logMaterial(log_path, materialName, createdMaterials, materialFiles, stats_resolutionAlternates, stats_fuzzyMatches)
+            stats_setsDone += 1
 
-    numOfMaterials = len(materialData)
-    with hou.InterruptableOperation(
-        "Creating textures...", "Executing PBR-Express...", open_interrupt_dialog=True) as operation:                
-        for index, (materialName, materialFiles) in enumerate(materialData.items()):
-            createdMaterial = nodeCreation(renderer,goal,materialFiles,materialName)  
-            createdMaterial_name = createdMaterial.name()
+        ### Progress from the real counts, the share of created materials scaled by the share of already classified files
+        percent = (float(stats_setsDone) / float(max(stats_setsFound, 1))) * (float(stats_filesClassified) / float(max(stats_filesScanned, 1)))
+        operation.updateLongProgress(percent, f"{stats_setsDone} of {stats_setsFound} materials created, {stats_filesClassified} of {stats_filesScanned} files classified")
 
-            ### Wite to log file
-            with open(log_path, "a") as file:
-                file.write(f"\n\n\n- Material: {createdMaterial_name}")
-                for metadata in materialFiles:
-                    file_path,file_name,texture_type,texture_set,file_extension = metadata
-                    file.write(f"\n\tFile Path: {file_path}\n")
-                    file.write(f"\tFile Name: {file_name}\n")
-                    file.write(f"\tFile Extension: {file_extension}\n") 
-                    file.write(f"\tTexture Type: {texture_type}\n")
-                    file.write(f"\tTexture Set: {texture_set}\n")                  
-
-
-            percent = (float(index) / float(numOfMaterials))
-            operation.updateLongProgress(percent)                       
-    
-  
+if library_output is not None:
+    library_path = writeLibraryLayer(library_output, list_library_layers)
+    print(f"[SUCCESS] Material library has been written to: {library_path}")
 
 
 #   ---LOGGING---
@@ -807,6 +1912,15 @@ if len(list_stats_redirectedTextures) > 0:
 
     print(f"[SUCCESS] Some invalid textures could be redirected to a fitting texture set.") 
 
+if len(list_stats_fuzzyMatches) > 0:
+    with open(log_path, "a") as file:
+        file.write("\n\n---------------------------------------------------\n\n")
+        file.write("List of fuzzy matched textures...     (texture type guessed from a misspelled keyword)\n\n")  
+        for entry in list_stats_fuzzyMatches:
+            file.write(f"\n\t{entry}\n")     
+
+    print(f"[INFO] Some textures were recognized by a fuzzy match, check the log file for their confidence: {list_stats_fuzzyMatches}") 
+
 if len(list_stats_hopelessTextures) > 0:
     print(f"[ERROR] Those files couldn't be associated with any texture sets and will be ignored: {list_stats_hopelessTextures}")  
     print(f"[INFO] Proceeding with the script.")                   
@@ -817,7 +1931,9 @@ print(f"\n\t[STATS] Total files processed: {len(list_stats_fileProcessed)}")
 print(f"\t[STATS] Total UDIMs detected: {len(list_stats_UDIMdetected)}")
 print(f"\t[STATS] Total unrecognized files: {(len(list_stats_invalidTextures)+len(list_stats_invalidExtensions))-len(list_stats_redirectedTextures)}")
 print(f"\t[STATS] Total redirected textures: {len(list_stats_redirectedTextures)}")
-print(f"\t[STATS] Total materials created: {len(list_stats_materialsCreated)}")
+print(f"\t[STATS] Total fuzzy matched textures: {len(list_stats_fuzzyMatches)}")
+print(f"\t[STATS] Total resolution variants skipped ({resolution_policy}): {len(list_stats_resolutionAlternates)}")
+print(f"\t[STATS] Total materials created: {len(list_stats_materialsCreated) * len(renderers)} ({len(list_stats_materialsCreated)} texture sets for {', '.join(renderers)})")
 
 print(f"\n\tLog file saved to: {log_path}")
 
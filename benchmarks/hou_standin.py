@@ -0,0 +1,305 @@
+# Stand-in for the parts of the hou module PBR-Express uses, so the script can be benchmarked without a Houdini session.
+# Every call is counted in `calls`, dialogs are answered from `answers`.
+
+import collections
+import time
+
+calls = collections.Counter()
+
+## Time of the first call of some methods, to measure how long it takes until the first material shows up
+timestamps = {}
+
+## Answers for the dialogs the script opens, set by the benchmark before every run
+answers = {
+    "mode": 1,
+    "files": "",
+    "renderers": (0,),
+    "output": "",
+}
+
+## Every node created through the stand-in, by path
+nodes = {}
+
+
+#   ---RECORDING---
+## System for resetting the counters and the node network between runs
+def reset():
+    calls.clear()
+    timestamps.clear()
+    nodes.clear()
+    Node("/mat", "matnet")
+    Node("/mat/material_dummy", "subnet")
+
+
+#   ---NODES AND PARMS---
+class OperationFailed(Exception):
+    pass
+
+
+class Color:
+    def __init__(self, rgb):
+        self.rgb = rgb
+
+
+class Parm:
+    def __init__(self, node, name):
+        self._node = node
+        self._name = name
+
+    def set(self, value):
+        calls["parm().set"] += 1
+        self._node._parms[self._name] = value
+
+    def setExpression(self, expression, language=None):
+        calls["parm().setExpression"] += 1
+        self._node._parms[self._name] = expression
+
+    def eval(self):
+        return self._node._parms.get(self._name)
+
+
+class NodeType:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+class NodeTypeCategory:
+    def name(self):
+        return "Vop"
+
+
+class Node:
+    def __init__(self, path, type_name):
+        self._path = path
+        self._type = NodeType(type_name)
+        self._parms = {}
+        self._inputs = {}
+        self._user_data = {}
+        self._parm_template_group = ParmTemplateGroup()
+        self._children = {}
+        nodes[path] = self
+
+        parent = self.parent()
+        if parent is not None and parent is not self:
+            parent._children[self.name()] = self
+
+    def name(self):
+        return self._path.rsplit("/", 1)[-1]
+
+    def path(self):
+        return self._path
+
+    def parent(self):
+        return nodes.get(self._path.rsplit("/", 1)[0] or "/")
+
+    def type(self):
+        return self._type
+
+    def childTypeCategory(self):
+        return NodeTypeCategory()
+
+    def children(self):
+        return list(self._children.values())
+
+    def allSubChildren(self):
+        sub_children = []
+        for child in self._children.values():
+            sub_children.append(child)
+            sub_children += child.allSubChildren()
+        return sub_children
+
+    def createNode(self, type_name, node_name=None):
+        calls["createNode"] += 1
+        base_name = node_name or f"{type_name.split(':')[0]}1"
+        name = base_name
+        suffix = 1
+        while name in self._children:
+            suffix += 1
+            name = f"{base_name}{suffix}"
+
+        node = Node(f"{self._path}/{name}", type_name)
+        ### Houdini fills new subnets with an input and an output node
+        if type_name == "subnet":
+            Node(f"{node._path}/subinput1", "subinput")
+            Node(f"{node._path}/suboutput1", "suboutput")
+        return node
+
+    def destroy(self):
+        calls["destroy"] += 1
+        for child in self.allSubChildren():
+            nodes.pop(child._path, None)
+        nodes.pop(self._path, None)
+
+        parent = self.parent()
+        if parent is not None:
+            parent._children.pop(self.name(), None)
+
+    def parm(self, name):
+        return Parm(self, name)
+
+    def setNamedInput(self, input_name, node, output_name):
+        calls["setNamedInput"] += 1
+        self._inputs[input_name] = (node, output_name)
+
+    def setInput(self, index, node, output_index=0):
+        calls["setInput"] += 1
+        self._inputs[index] = (node, output_index)
+
+    def parmTemplateGroup(self):
+        calls["parmTemplateGroup"] += 1
+        return self._parm_template_group
+
+    def setParmTemplateGroup(self, group):
+        calls["setParmTemplateGroup"] += 1
+        self._parm_template_group = group
+
+    def setUserData(self, name, value):
+        calls["setUserData"] += 1
+        self._user_data[name] = value
+
+    def setColor(self, color):
+        calls["setColor"] += 1
+
+    def setMaterialFlag(self, on):
+        calls["setMaterialFlag"] += 1
+
+    def moveToGoodPosition(self):
+        calls["moveToGoodPosition"] += 1
+        timestamps.setdefault("moveToGoodPosition", time.perf_counter())
+
+    def layoutChildren(self):
+        calls["layoutChildren"] += 1
+
+
+def node(path):
+    return nodes.get(path)
+
+
+#   ---PARM TEMPLATES---
+class ParmTemplate:
+    def __init__(self, name=None, label=None, *args, **kwargs):
+        self._name = name
+        self._label = label
+        self._templates = []
+
+    def addParmTemplate(self, template):
+        self._templates.append(template)
+
+    def setLabel(self, label):
+        self._label = label
+
+    def setDefaultValue(self, value):
+        pass
+
+    def setDefaultExpression(self, expression):
+        pass
+
+    def setDefaultExpressionLanguage(self, language):
+        pass
+
+
+FolderParmTemplate = ParmTemplate
+IntParmTemplate = ParmTemplate
+FloatParmTemplate = ParmTemplate
+StringParmTemplate = ParmTemplate
+ToggleParmTemplate = ParmTemplate
+SeparatorParmTemplate = ParmTemplate
+ButtonParmTemplate = ParmTemplate
+
+
+class ParmTemplateGroup:
+    def __init__(self):
+        self._templates = []
+
+    def append(self, template):
+        self._templates.append(template)
+
+
+class properties:
+    @staticmethod
+    def parmTemplate(category, name):
+        return ParmTemplate(name)
+
+
+class folderType:
+    Collapsible = "Collapsible"
+
+
+class scriptLanguage:
+    Python = "Python"
+
+
+class exprLanguage:
+    Hscript = "Hscript"
+    Python = "Python"
+
+
+class fileType:
+    Directory = "Directory"
+    Image = "Image"
+    Any = "Any"
+
+
+#   ---UI---
+class NetworkEditor:
+    def isCurrentTab(self):
+        return True
+
+    def currentNode(self):
+        return nodes["/mat/material_dummy"]
+
+
+class InterruptableOperation:
+    def __init__(self, operation_name, long_operation_name=None, open_interrupt_dialog=False):
+        self.operation_name = operation_name
+
+    def __enter__(self):
+        calls["InterruptableOperation"] += 1
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def updateLongProgress(self, percentage=-1.0, long_op_status=None):
+        calls["updateLongProgress"] += 1
+
+    def updateProgress(self, percentage=-1.0):
+        calls["updateProgress"] += 1
+
+
+class ui:
+    @staticmethod
+    def displayMessage(text, buttons=("OK",), **kwargs):
+        if len(buttons) > 1:
+            return answers["mode"]
+        return 0
+
+    @staticmethod
+    def selectFile(title=None, file_type=None, **kwargs):
+        if file_type == fileType.Directory and "library" in (title or ""):
+            return answers["output"]
+        return answers["files"]
+
+    @staticmethod
+    def selectFromList(choices, **kwargs):
+        return answers["renderers"]
+
+    @staticmethod
+    def selectNode(**kwargs):
+        return "/mat"
+
+    @staticmethod
+    def paneTabs():
+        return [NetworkEditor()]
+
+
+class text:
+    @staticmethod
+    def expandString(value):
+        return value
+
+
+reset()
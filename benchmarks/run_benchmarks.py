@@ -0,0 +1,219 @@
+# Benchmark suite for PBR-Express, runs the script against synthetic texture libraries with a stand-in for hou
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py                      compare against benchmarks/baselines.json
+#   python benchmarks/run_benchmarks.py --update-baselines   store the current results as new baselines
+#   python benchmarks/run_benchmarks.py --scenario small     only run the given scenario(s)
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+script_path = os.path.join(os.path.dirname(benchmark_dir), "PBR-Express.py")
+baselines_path = os.path.join(benchmark_dir, "baselines.json")
+
+sys.path.insert(0, benchmark_dir)
+import hou_standin
+import synthetic_library
+
+sys.modules["hou"] = hou_standin
+
+## Synthetic libraries and the renderers used for the end-to-end run, "settings" overrides variables at the top of the script
+scenarios = {
+    "small":            {"library": {"materials": 50, "texture_types": 5}, "renderers": ["MaterialX"]},
+    "udim":             {"library": {"materials": 20, "texture_types": 4, "udim_tiles": 10}, "renderers": ["MaterialX"]},
+    "dash_naming":      {"library": {"materials": 100, "texture_types": 6, "naming_style": "dash", "junk_files": 50}, "renderers": ["MaterialX (USD export optimized)"]},
+    "vendor_variants":  {"library": {"materials": 100, "texture_types": 5, "naming_style": "vendor", "resolutions": ("2K", "4K", "8K"), "junk_files": 100}, "renderers": ["MaterialX"]},
+    "typo_naming":      {"library": {"materials": 100, "texture_types": 8, "naming_style": "typo", "junk_files": 50}, "renderers": ["MaterialX"], "settings": {"fuzzy_matching": True}},
+    "mantra":           {"library": {"materials": 100, "texture_types": 8}, "renderers": ["Mantra"]},
+    "large":            {"library": {"materials": 1000, "texture_types": 5, "junk_files": 200}, "renderers": ["MaterialX"]},
+    "large_subfolders": {"library": {"materials": 1000, "texture_types": 5, "subfolders": True}, "renderers": ["MaterialX"]},
+    "zip_archive":      {"archive": {"materials": 200, "texture_types": 5, "resolutions": ("2K", "4K"), "subfolders": True, "junk_files": 50}, "renderers": ["MaterialX"]},
+    "multi_renderer":   {"library": {"materials": 100, "texture_types": 5}, "renderers": ["MaterialX", "Mantra", "MaterialX + USD library (direct file export)"]},
+    "library_export":   {"library": {"materials": 500, "texture_types": 6}, "renderers": ["MaterialX + USD library (direct file export)"]},
+}
+
+## Metrics where higher is better, every other metric is better when lower
+higher_is_better = ["files_per_second"]
+
+## Metrics that only depend on the script and not on the machine, any change is reported
+exact_metrics = ["nodes_per_material", "parm_writes_per_material", "materials"]
+
+## Every other metric is a timing, those depend on the machine and only fail the run with --check-timings (baselines recorded on the same machine)
+
+
+#   ---DEFINITIONS---
+## System for reading the script with some of its variables replaced, the same as changing them at the top of the script by hand
+def scriptSource(settings):
+    with open(script_path) as file:
+        source = file.read()
+
+    for name, value in settings.items():
+        source, replaced = re.subn(rf"^{re.escape(name)} = .*$", f"{name} = {value!r}", source, count=1, flags=re.MULTILINE)
+        if replaced == 0:
+            raise ValueError(f"Unknown setting: {name}")
+
+    return source
+
+## System for loading the definitions of PBR-Express without running the interactive part of the script
+def loadDefinitions(settings):
+    source = scriptSource(settings).split("#   ---EXECUTE DEFINITIONS---")[0]
+
+    namespace = {"__name__": "PBR-Express"}
+    exec(compile(source, script_path, "exec"), namespace)
+    return namespace
+
+## System for timing the classification alone (the same units of work the pipeline hands to its workers), best of several repeats
+def benchmarkClassification(definitions, library_root, repeats):
+    best_time = None
+    for repeat in range(repeats):
+        files_processed = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for unit in definitions["scanUnits"](library_root, "Folder"):
+                files_processed += len(definitions["techChecker"](unit, "File")[2])
+        elapsed = time.perf_counter() - start
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+
+    return files_processed, best_time
+
+## System for running the whole script once end-to-end against the hou stand-in and recording what it did
+def benchmarkEndToEnd(definitions, library_root, renderers, work_dir, settings):
+    hou_standin.reset()
+    hou_standin.answers["mode"] = 1
+    hou_standin.answers["files"] = library_root
+    hou_standin.answers["renderers"] = tuple(definitions["supported_renderers"].index(renderer) for renderer in renderers)
+    hou_standin.answers["output"] = os.path.join(work_dir, "library")
+
+    os.environ["HOUDINI_TEMP_DIR"] = work_dir
+    os.environ["HIPNAME"] = "benchmark"
+
+    code = compile(scriptSource(settings), script_path, "exec")
+    namespace = {"__name__": "PBR-Express"}
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        exec(code, namespace)
+    end = time.perf_counter()
+
+    ### Materials for node based renderers are placed with moveToGoodPosition(), the direct file export only counts as done at the end
+    first_material = hou_standin.timestamps.get("moveToGoodPosition", end)
+
+    return len(namespace["list_stats_materialsCreated"]), end - start, first_material - start, dict(hou_standin.calls)
+
+## System for running a single scenario and collecting its metrics
+def runScenario(name, scenario, repeats):
+    settings = scenario.get("settings", {})
+    definitions = loadDefinitions(settings)
+
+    with tempfile.TemporaryDirectory(prefix=f"pbr-express-{name}-") as work_dir:
+        library_root = os.path.join(work_dir, "textures", "")
+        if "archive" in scenario:
+            synthetic_library.generateArchive(library_root, **scenario["archive"])
+        else:
+            synthetic_library.generateLibrary(library_root, **scenario["library"])
+
+        files_processed, classify_time = benchmarkClassification(definitions, library_root, repeats)
+        end_to_end_time = None
+        first_material_time = None
+        for repeat in range(repeats):
+            materials, elapsed, first_material, calls = benchmarkEndToEnd(definitions, library_root, scenario["renderers"], work_dir, settings)
+            if end_to_end_time is None or elapsed < end_to_end_time:
+                end_to_end_time = elapsed
+            if first_material_time is None or first_material < first_material_time:
+                first_material_time = first_material
+
+    parm_writes = calls.get("parm().set", 0) + calls.get("parm().setExpression", 0)
+    return {
+        "files": files_processed,
+        "materials": materials,
+        "files_per_second": round(files_processed / classify_time, 1),
+        "nodes_per_material": round(calls.get("createNode", 0) / max(materials, 1), 2),
+        "parm_writes_per_material": round(parm_writes / max(materials, 1), 2),
+        "first_material_seconds": round(first_material_time, 4),
+        "end_to_end_seconds": round(end_to_end_time, 4),
+    }
+
+## System for comparing results against the stored baselines, returns the changed exact metrics and the timings outside of the tolerance
+def compareBaselines(results, baselines, tolerance):
+    regressions = []
+    slowdowns = []
+    for name, metrics in results.items():
+        if name not in baselines:
+            continue
+        for metric, baseline in baselines[name].items():
+            if metric not in metrics or metric == "files":
+                continue
+            value = metrics[metric]
+
+            if metric in exact_metrics:
+                if value != baseline:
+                    regressions.append(f"{name}: {metric} changed from {baseline} to {value}")
+            elif metric in higher_is_better:
+                if value < baseline * (1 - tolerance):
+                    slowdowns.append(f"{name}: {metric} dropped from {baseline} to {value}")
+            elif value > baseline * (1 + tolerance):
+                slowdowns.append(f"{name}: {metric} went up from {baseline} to {value}")
+
+    return regressions, slowdowns
+
+## System for printing the results as a table
+def printResults(results):
+    columns = ["files", "materials", "files_per_second", "nodes_per_material", "parm_writes_per_material", "first_material_seconds", "end_to_end_seconds"]
+    print(f"{'scenario':<18}" + "".join(f"{column:>26}" for column in columns))
+    for name, metrics in results.items():
+        print(f"{name:<18}" + "".join(f"{metrics.get(column, '-'):>26}" for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks PBR-Express against synthetic texture libraries.")
+    parser.add_argument("--scenario", action="append", choices=sorted(scenarios), help="Scenario to run, can be given multiple times. Runs all by default.")
+    parser.add_argument("--repeats", type=int, default=3, help="Repeats of every timed benchmark, the best time is used.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baselines before it is reported.")
+    parser.add_argument("--check-timings", action="store_true", help="Also fail on slowdowns, only meaningful if the baselines were recorded on this machine.")
+    parser.add_argument("--update-baselines", action="store_true", help="Store the results as the new baselines.")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenario or scenarios:
+        results[name] = runScenario(name, scenarios[name], args.repeats)
+
+    printResults(results)
+
+    baselines = {}
+    if os.path.isfile(baselines_path):
+        with open(baselines_path) as file:
+            baselines = json.load(file)
+
+    if args.update_baselines:
+        baselines.update(results)
+        with open(baselines_path, "w") as file:
+            json.dump(baselines, file, indent=4, sort_keys=True)
+            file.write("\n")
+        print(f"\nBaselines saved to: {baselines_path}")
+        return 0
+
+    regressions, slowdowns = compareBaselines(results, baselines, args.tolerance)
+    if len(slowdowns) > 0:
+        print("\n[SLOWER] " + "\n[SLOWER] ".join(slowdowns))
+        if args.check_timings:
+            regressions += slowdowns
+
+    if len(regressions) > 0:
+        print("\n[REGRESSION] " + "\n[REGRESSION] ".join(regressions))
+        return 1
+
+    print("\nNo regressions against the stored baselines.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# Generators for synthetic texture libraries. The files are empty, PBR-Express only looks at their names.
+
+import os
+import random
+import shutil
+import tempfile
+import zipfile
+
+## Texture type keywords used for the generated files, one naming variation per type and style
+texture_keywords = {
+    "underscore":   ["albedo", "normal", "roughness", "ao", "height", "metallic", "opacity", "emission"],
+    "dash":         ["basecolor", "nor", "rough", "occlusion", "disp", "metalness", "alpha", "emissive"],
+    "vendor":       ["BaseColor", "Normal", "Roughness", "AO", "Displacement", "Metalness", "Opacity", "Emissive"],
+    "typo":         ["albdeo", "nrml", "Rougness", "ambientoclusion", "heigth", "metalic", "opacty", "emisison"],
+}
+
+## Files every vendor pack seems to ship next to the textures
+junk_names = ["preview.jpg", "readme.txt", "license.pdf", "thumbnail.png", "Thumbs.db"]
+
+
+#   ---DEFINITIONS---
+## System for building the file name of one texture in the given naming style
+def textureFileName(style, material_index, keyword, resolution, udim, extension):
+    if style == "underscore":
+        name = f"Material_{material_index:05d}_{resolution}_{keyword}"
+    elif style == "dash":
+        name = f"material-{material_index:05d}-{resolution}-{keyword}"
+    elif style == "typo":
+        name = f"Typo_Material_{material_index:05d}_{resolution}_{keyword}"
+    elif style == "vendor":
+        name = f"vendor_pack_{material_index:05d}_{resolution}_{keyword}"
+    else:
+        raise ValueError(f"Unknown naming style: {style}")
+
+    if udim is not None:
+        name = f"{name}.{udim}"
+
+    return f"{name}.{extension}"
+
+## System for generating a synthetic texture library, returns the list of created files
+def generateLibrary(root, materials=100, texture_types=5, udim_tiles=0, naming_style="underscore", junk_files=0, resolutions=("2K",), subfolders=False, extension="png", seed=0):
+    rng = random.Random(seed)
+    keywords = texture_keywords[naming_style][:texture_types]
+    udims = [1001 + tile for tile in range(udim_tiles)] or [None]
+
+    created = []
+    for material_index in range(materials):
+        folder = os.path.join(root, f"pack_{material_index // 50:03d}") if subfolders else root
+        os.makedirs(folder, exist_ok=True)
+
+        for resolution in resolutions:
+            for keyword in keywords:
+                for udim in udims:
+                    created.append(os.path.join(folder, textureFileName(naming_style, material_index, keyword, resolution, udim, extension)))
+
+    for junk_index in range(junk_files):
+        junk_name = rng.choice(junk_names)
+        created.append(os.path.join(root, f"{junk_index:05d}_{junk_name}"))
+
+    for file_path in created:
+        open(file_path, "w").close()
+
+    return created
+
+## System for generating a synthetic texture library packed into a zip archive like a vendor download, returns the path of the archive
+def generateArchive(root, archive_name="pack.zip", **library_settings):
+    os.makedirs(root, exist_ok=True)
+    archive_path = os.path.join(root, archive_name)
+
+    staging_root = tempfile.mkdtemp(prefix="pbr-express-archive-")
+    try:
+        created = generateLibrary(staging_root, **library_settings)
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for file_path in created:
+                archive.write(file_path, os.path.relpath(file_path, staging_root))
+    finally:
+        shutil.rmtree(staging_root)
+
+    return archive_path
@@ -0,0 +1,23 @@
+# Loads the definitions of PBR-Express without running the interactive part of the script, the same way the benchmarks do
+
+import os
+import warnings
+
+import pytest
+
+script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PBR-Express.py")
+
+with open(script_path) as file:
+    definitions_source = file.read().split("#   ---EXECUTE DEFINITIONS---")[0]
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", SyntaxWarning)
+    definitions_code = compile(definitions_source, script_path, "exec")
+
+
+## Fresh definitions for every test, so settings changed by a test (e.g. resolution_policy) don't leak into the next one
+@pytest.fixture
+def pbr():
+    namespace = {"__name__": "PBR-Express"}
+    exec(definitions_code, namespace)
+    return namespace
@@ -0,0 +1,126 @@
+# Checks for the extraction of textures out of zip archives (archiveExtraction, archiveExtract)
+
+import os
+import zipfile
+
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOUDINI_TEMP_DIR", str(tmp_path / "temp"))
+    return tmp_path
+
+
+def metadata(file_path, texture_type, texture_set):
+    file_name, __sep, file_extension = file_path.rpartition("/")[2].rpartition(".")
+    return (file_path, file_name, texture_type, texture_set, file_extension)
+
+
+def writeArchive(archive_path, members):
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for member, content in members.items():
+            archive.writestr(member, content)
+
+
+def test_archive_extraction(pbr, cache):
+    archive_path = str(cache / "pack.zip")
+    writeArchive(archive_path, {"Brick_4K_albedo.png": b"albedo", "Brick_4K_normal.png": b"normal"})
+
+    data = [metadata(f"{archive_path}/Brick_4K_albedo.png", "DIFFUSE", "Brick"), metadata(f"{archive_path}/Brick_4K_normal.png", "NORMAL", "Brick")]
+    extracted, archive_paths, alternates, archive_alternates = pbr["archiveExtraction"](data, {})
+
+    assert len(extracted) == 2
+    for file_path, file_name, texture_type, texture_set, file_extension in extracted:
+        assert file_path.startswith(str(cache / "temp"))
+        assert os.path.isfile(file_path)
+
+    ### Same content again, nothing gets extracted twice
+    assert pbr["archiveExtraction"](data, {})[0] == extracted
+
+
+def test_archive_alternates_are_not_extracted(pbr, cache):
+    archive_path = str(cache / "pack.zip")
+    writeArchive(archive_path, {"Brick_4K_albedo.png": b"4k", "Brick_2K_albedo.png": b"2k"})
+
+    file_path = f"{archive_path}/Brick_4K_albedo.png"
+    data = [metadata(file_path, "DIFFUSE", "Brick")]
+    extracted, archive_paths, alternates, archive_alternates = pbr["archiveExtraction"](data, {file_path: [("2K", f"{archive_path}/Brick_2K_albedo.png")]})
+
+    [(resolution, alternate_path)] = alternates[extracted[0][0]]
+    assert resolution == "2K"
+    assert alternate_path.startswith(str(cache / "temp"))
+    assert not os.path.isfile(alternate_path)
+    assert archive_alternates[alternate_path] == [(alternate_path, archive_path, "Brick_2K_albedo.png")]
+
+    ### The button on the material extracts them where the stored path points to
+    class Node:
+        def userData(self, name):
+            return "\n".join(f"{target_path}\t{archive}\t{member}" for target_path, archive, member in archive_alternates[alternate_path])
+
+    exec(pbr["archive_alternates_callback"], {"kwargs": {"node": Node()}})
+    with open(alternate_path, "rb") as file:
+        assert file.read() == b"2k"
+
+
+def test_archive_corrupted_member_is_skipped(pbr, cache, capsys):
+    archive_path = str(cache / "pack.zip")
+    writeArchive(archive_path, {"Brick_4K_albedo.png": b"albedo" * 100, "Brick_4K_normal.png": b"normal" * 100})
+
+    ### Breaks the compressed data of the first member, reading it fails on the CRC or the deflate stream
+    with zipfile.ZipFile(archive_path) as archive:
+        info = archive.getinfo("Brick_4K_albedo.png")
+    with open(archive_path, "r+b") as file:
+        file.seek(info.header_offset + 30 + len(info.filename) + 2)
+        file.write(b"\xff\xff\xff\xff")
+
+    data = [metadata(f"{archive_path}/Brick_4K_albedo.png", "DIFFUSE", "Brick"), metadata(f"{archive_path}/Brick_4K_normal.png", "NORMAL", "Brick")]
+    extracted, archive_paths, alternates, archive_alternates = pbr["archiveExtraction"](data, {})
+
+    assert [texture_type for file_path, file_name, texture_type, texture_set, file_extension in extracted] == ["NORMAL"]
+    assert "Brick_4K_albedo.png" in capsys.readouterr().out
+
+    ### No half written file is left in the cache
+    cache_files = [file_name for root, dirs, files in os.walk(str(cache / "temp")) for file_name in files]
+    assert cache_files == ["Brick_4K_normal.png"]
+
+
+def test_archive_unreadable_is_skipped(pbr, cache, capsys):
+    archive_path = str(cache / "pack.zip")
+    with open(archive_path, "wb") as file:
+        file.write(b"not a zip archive")
+
+    data = [metadata(f"{archive_path}/Brick_4K_albedo.png", "DIFFUSE", "Brick"), metadata(str(cache / "Wood_albedo.png"), "DIFFUSE", "Wood")]
+    extracted, archive_paths, alternates, archive_alternates = pbr["archiveExtraction"](data, {})
+
+    assert [texture_set for file_path, file_name, texture_type, texture_set, file_extension in extracted] == ["Wood"]
+    assert capsys.readouterr().out.count(archive_path) == 1
+
+
+def test_archive_units_skip_macos_resource_forks(pbr, cache):
+    archive_path = str(cache / "pack.zip")
+    writeArchive(archive_path, {"Brick_albedo.png": b"albedo", "__MACOSX/._Brick_albedo.png": b"fork", "maps/._Brick_normal.png": b"fork", "maps/Brick_normal.png": b"normal"})
+
+    units = list(pbr["archiveUnits"](archive_path))
+    assert sorted(file for unit in units for file in unit) == [f"{archive_path}/Brick_albedo.png", f"{archive_path}/maps/Brick_normal.png"]
+    assert {name for unit in units for name in pbr["techChecker"](unit, "File")[1]} == {"Brick"}
+
+
+def test_archive_extract_counts_reused_members(pbr, cache, capsys):
+    archive_path = str(cache / "pack.zip")
+    writeArchive(archive_path, {"Brick_albedo.1001.png": b"tile" * 100, "Brick_albedo.1002.png": b"tile" * 100})
+
+    with zipfile.ZipFile(archive_path) as archive:
+        assert pbr["archiveExtract"](archive, "Brick_albedo.<UDIM>.png")[1:] == (2, 0)
+        assert pbr["archiveExtract"](archive, "Brick_albedo.<UDIM>.png")[1:] == (0, 2)
+
+    ### A member that fails is neither extracted nor reused
+    with zipfile.ZipFile(archive_path) as archive:
+        os.remove(os.path.join(pbr["archiveCacheFolder"](archive, "Brick_albedo.<UDIM>.png")[1], "Brick_albedo.1002.png"))
+        info = archive.getinfo("Brick_albedo.1002.png")
+    with open(archive_path, "r+b") as file:
+        file.seek(info.header_offset + 30 + len(info.filename) + 2)
+        file.write(b"\xff\xff\xff\xff")
+
+    with zipfile.ZipFile(archive_path) as archive:
+        assert pbr["archiveExtract"](archive, "Brick_albedo.<UDIM>.png") == (None, 0, 1)
@@ -0,0 +1,93 @@
+# Checks that classifying a big folder in batches (classificationBatches, texturePipeline) gives the same materials as classifying it in one go
+
+import pytest
+
+
+## Resolution packs with mixed suffixes, some sets without any suffix, extra maps without a keyword and set names that contain each other ("Brick_3" and "Brick_35")
+def resolutionPack(materials=80):
+    files = []
+    for index in range(materials):
+        resolutions = [""] if index % 5 == 3 else ["_2K", "_4K"] if index % 2 else ["_2K"]
+        for resolution in resolutions:
+            for keyword in ["albedo", "normal", "roughness"]:
+                files.append(f"/t/Brick_{index}{resolution}_{keyword}.png")
+        for extra in ["spec", "gloss", "preview"][:index % 3 + 1]:
+            files.append(f"/t/Brick_{index}_{extra}.png")
+
+    return files
+
+## Separator and keyword position variations, set names that only differ by a separator and typos for the fuzzy pass
+def mixedPack(materials=60):
+    files = []
+    for index in range(materials):
+        base = ["Wall_Light", "Stone-Tile", "Metal"][index % 3] + f"_{index // 3}"
+        resolution = ["", "_2K", "-4K", "_8k"][index % 4]
+        files += [f"/t/{base}{resolution}_albedo.png", f"/t/{base}{resolution}-nor.png", f"/t/ao_{base}{resolution}.png", f"/t/{base}_height{resolution}.png"]
+        files += [f"/t/{base}_mask.png", f"/t/Rougness_{base}{resolution}.png", f"/t/{base}{resolution}_nrml.png"]
+
+    return files
+
+
+def classifyBatched(pbr, files):
+    data = set()
+    hopeless = set()
+    for batch in pbr["classificationBatches"](files):
+        result = pbr["techChecker"](batch, "File")
+        data |= set(result[0])
+        hopeless |= set(result[6])
+
+    return data, hopeless
+
+
+@pytest.mark.parametrize("files", [resolutionPack(), mixedPack()], ids=["resolution_pack", "mixed_pack"])
+@pytest.mark.parametrize("fuzzy_matching", [False, True])
+def test_batches_classify_like_the_whole_folder(pbr, files, fuzzy_matching):
+    pbr["fuzzy_matching"] = fuzzy_matching
+    whole = pbr["techChecker"](files, "File")
+
+    pbr["classification_batch_size"] = 50
+    assert len(pbr["classificationBatches"](files)) > 1
+    data, hopeless = classifyBatched(pbr, files)
+
+    assert data == set(whole[0])
+    assert hopeless == set(whole[6])
+
+
+def test_batches_keep_texture_sets_together(pbr):
+    files = resolutionPack()
+    pbr["classification_batch_size"] = 50
+    batches = pbr["classificationBatches"](files)
+
+    assert sorted(file for batch in batches for file in batch) == sorted(files)
+    for batch in batches:
+        assert len(batch) < 50 + 20
+    batch_of_set = {}
+    for index, batch in enumerate(batches):
+        for m in pbr["techChecker"](batch, "File")[0]:
+            assert batch_of_set.setdefault(m[3], index) == index
+
+
+def test_small_folders_are_not_batched(pbr):
+    files = resolutionPack(10)
+    assert pbr["classificationBatches"](files) == [files]
+
+
+def test_texture_pipeline_sends_every_set_once(pbr, tmp_path):
+    folder = tmp_path / "textures"
+    folder.mkdir()
+    for file in resolutionPack():
+        (folder / file.rpartition("/")[2]).touch()
+
+    pbr["classification_batch_size"] = 50
+    messages = list(pbr["texturePipeline"]([str(folder)], "Folder"))
+
+    scanned = sum(message[1] for message in messages if message[0] == "scanned")
+    sets = {}
+    for message in messages:
+        if message[0] == "set":
+            assert message[1] not in sets
+            sets[message[1]] = sorted(m[0].rpartition("/")[2] for m in message[2])
+
+    whole = pbr["textureSetGrouping"](pbr["techChecker"](resolutionPack(), "File")[0])
+    assert scanned == len(resolutionPack())
+    assert sets == {name: sorted(m[0].rpartition("/")[2] for m in materialFiles) for name, materialFiles in whole.items()}
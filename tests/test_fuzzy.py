@@ -0,0 +1,133 @@
+# Checks for the typo tolerant classification (levenshtein, typoDistance, bkTreeSearch, fuzzyMatch and its use inside techChecker)
+
+import itertools
+
+import pytest
+
+
+def classify(pbr, *file_names):
+    data, materialNames = pbr["techChecker"]([f"/t/{file_name}" for file_name in file_names], "File")[:2]
+    return {m[1]: (m[2], m[3]) for m in data}, materialNames
+
+
+def test_levenshtein(pbr):
+    levenshtein = pbr["levenshtein"]
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("height", "height") == 0
+    assert levenshtein("rougness", "roughness") == 1
+    assert levenshtein("heigth", "height") == 2
+    for a, b in itertools.permutations(["disp", "bump", "normal", "formal", ""], 2):
+        assert levenshtein(a, b) == levenshtein(b, a)
+
+
+def test_typo_distance_counts_swapped_letters_once(pbr):
+    assert pbr["typoDistance"]("heigth", "height") == 1
+    assert pbr["typoDistance"]("albdeo", "albedo") == 1
+    assert pbr["typoDistance"]("kitten", "sitting") == 3
+    assert pbr["typoDistance"]("", "ao") == 2
+
+
+def test_bk_tree_search_matches_brute_force(pbr):
+    words = ["height", "weight", "light", "normal", "formal", "disp", "disk", "bump", "jump", "roughness", "rough", "ao", "opacity", "emission"]
+    tree = None
+    for word in words:
+        tree = pbr["bkTreeInsert"](tree, word)
+
+    for query in ["heigth", "nrml", "dis", "rougness", "xyz", "emision"]:
+        for max_distance in range(4):
+            expected = sorted((pbr["levenshtein"](query, word), word) for word in words if pbr["levenshtein"](query, word) <= max_distance)
+            assert sorted(pbr["bkTreeSearch"](tree, query, max_distance)) == expected
+
+    assert pbr["bkTreeSearch"](None, "height", 2) == []
+
+
+@pytest.mark.parametrize("file_name, texture_type", [
+    ("Metal_Rougness", "ROUGH"),
+    ("Brick_heigth", "DISP"),
+    ("Wood_metalic", "METALLIC"),
+    ("Glass_opacty", "OPACITY"),
+    ("Lamp_emisison", "EMISSION"),
+    ("Stone_albdeo", "DIFFUSE"),
+    ("brick_nrml", "NORMAL"),
+    ("Metal_rghnss", "ROUGH"),
+    ("Tile_Rghness", "ROUGH"),
+])
+def test_fuzzy_match_typos(pbr, file_name, texture_type):
+    assert pbr["fuzzyMatch"](file_name)[0] == texture_type
+
+
+@pytest.mark.parametrize("file_name", [
+    "Wall_Light_Specular",
+    "Metal_Bright_Gloss",
+    "Fabric_Night_curvature",
+    "Rock_Weight",
+    "Stone_Disk_spec",
+    "Leather_Jump_mask",
+    "Floor_Formal_gloss",
+    "Capacity_Mask",
+    "Mission_Mask",
+    "Stone_oa",
+])
+def test_fuzzy_match_ignores_look_alike_words(pbr, file_name):
+    assert pbr["fuzzyMatch"](file_name) is None
+
+
+def test_fuzzy_match_skips_known_tokens(pbr):
+    assert pbr["fuzzyMatch"]("Roughnes_Wood_albdeo")[0] == "ROUGH"
+    assert pbr["fuzzyMatch"]("Roughnes_Wood_albdeo", {"roughnes", "wood"})[0] == "DIFFUSE"
+
+
+def test_fuzzy_matching_is_off_by_default(pbr):
+    files, materialNames = classify(pbr, "Metal_Rougness.png")
+    assert files == {}
+
+
+def test_tech_checker_keeps_redirect_before_fuzzy(pbr):
+    pbr["fuzzy_matching"] = True
+    files, materialNames = classify(pbr, "Wall_Light_Albedo.png", "Wall_Light_Normal.png", "Wall_Light_Specular.png")
+
+    assert materialNames == {"Wall_Light"}
+    assert files["Wall_Light_Specular"] == ("Unknown", "Wall_Light")
+
+
+def test_tech_checker_fuzzy_types_redirected_files(pbr):
+    pbr["fuzzy_matching"] = True
+    files, materialNames = classify(pbr, "Wood_albedo.png", "Wood_Rougness.png")
+
+    assert materialNames == {"Wood"}
+    assert files["Wood_Rougness"] == ("ROUGH", "Wood")
+
+
+@pytest.mark.parametrize("file_name", [
+    "Metal_Bright_Gloss.png",
+    "Fabric_Night_curvature.png",
+    "Rock_Weight.png",
+    "Stone_Disk_spec.png",
+    "Leather_Jump_mask.png",
+    "Floor_Formal_gloss.png",
+    "Capacity_Mask.png",
+    "Mission_Mask.png",
+])
+def test_tech_checker_leaves_look_alike_words_unknown(pbr, file_name):
+    pbr["fuzzy_matching"] = True
+    files, materialNames = classify(pbr, file_name)
+
+    assert files == {}
+
+
+def test_fuzzy_matches_are_stored_on_the_material(pbr):
+    pbr["fuzzy_matching"] = True
+    result = pbr["techChecker"](["/t/Brick_albedo.png", "/t/Brick_nrml.png"], "File")
+    data, fuzzyMatches = result[0], result[8]
+
+    class Material:
+        def __init__(self):
+            self.user_data = {}
+
+        def setUserData(self, name, value):
+            self.user_data[name] = value
+
+    material = Material()
+    pbr["storeFuzzyMatches"](material, data, fuzzyMatches)
+    assert material.user_data == {"PBR-Express_fuzzy_matches": "NORMAL 1.0: /t/Brick_nrml.png ('nrml' ~ 'nrml')"}
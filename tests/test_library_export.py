@@ -0,0 +1,118 @@
+# Checks for the direct file export (writeMaterialX, writeUSDA, libraryName, libraryExport, writeLibraryLayer)
+
+import concurrent.futures
+import os
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+
+def metadata(file_path, texture_type, texture_set):
+    file_name, __sep, file_extension = file_path.rpartition("/")[2].rpartition(".")
+    return (file_path, file_name, texture_type, texture_set, file_extension)
+
+
+## Texture set with relative paths, the written files must not depend on the folder they are opened from
+@pytest.fixture
+def brick(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return [
+        metadata("textures/Brick_albedo.png", "DIFFUSE", "Brick"),
+        metadata("textures/Brick_ao.png", "AO", "Brick"),
+        metadata("textures/Brick_normal.png", "NORMAL", "Brick"),
+        metadata("textures/Brick_height.png", "DISP", "Brick"),
+        metadata("textures/Brick_roughness.png", "ROUGH", "Brick"),
+    ]
+
+
+def inputs(element):
+    return {node_input.get("name"): node_input.get("nodename") or node_input.get("value") for node_input in element.findall("input")}
+
+
+def test_materialx_wiring(pbr, brick, tmp_path):
+    document = ET.parse(pbr["writeMaterialX"](brick, "Brick", str(tmp_path))).getroot()
+    nodes = {node.get("name"): node for node in document}
+    images = {os.path.basename(inputs(node)["file"]): name for name, node in nodes.items() if node.tag == "tiledimage"}
+
+    ### Base color is the albedo multiplied by the ambient occlusion
+    assert inputs(nodes["multiply"]) == {"in1": images["Brick_albedo.png"], "in2": images["Brick_ao.png"]}
+    assert nodes[images["Brick_albedo.png"]].get("type") == "color3"
+
+    assert nodes["normalmap"].tag == "normalmap"
+    assert inputs(nodes["normalmap"]) == {"in": images["Brick_normal.png"]}
+
+    assert inputs(nodes["remap"])["in"] == images["Brick_height.png"]
+    assert inputs(nodes["displacement"])["displacement"] == "remap"
+
+    surface = inputs(nodes["Brick_surface"])
+    assert surface["base_color"] == "multiply"
+    assert surface["normal"] == "normalmap"
+    assert surface["specular_roughness"] == images["Brick_roughness.png"]
+    assert inputs(nodes["Brick"]) == {"surfaceshader": "Brick_surface", "displacementshader": "displacement"}
+
+
+def test_materialx_without_optional_maps(pbr, tmp_path):
+    document = ET.parse(pbr["writeMaterialX"]([metadata("/t/Wood_roughness.png", "ROUGH", "Wood")], "Wood", str(tmp_path))).getroot()
+    names = {node.get("name") for node in document}
+
+    assert {"multiply", "normalmap", "remap", "displacement"}.isdisjoint(names)
+    assert inputs(document.find("surfacematerial")) == {"surfaceshader": "Wood_surface"}
+
+
+def test_materialx_texture_paths_are_absolute(pbr, brick, tmp_path):
+    (tmp_path / "library").mkdir()
+    document = ET.parse(pbr["writeMaterialX"](brick, "Brick", str(tmp_path / "library"))).getroot()
+    files = sorted(inputs(node)["file"] for node in document.iter("tiledimage"))
+
+    assert files == sorted(str(tmp_path / m[0]) for m in brick)
+
+
+def test_usda_wiring_and_texture_paths(pbr, brick, tmp_path):
+    with open(pbr["writeUSDA"](brick, "Brick", str(tmp_path))) as file:
+        layer = file.read()
+
+    shaders = dict(re.findall(r'def Shader "(\w+)"\s*\{\s*uniform token info:id = "UsdUVTexture"\s*asset inputs:file = @([^@]+)@', layer))
+    textures = {os.path.basename(file_path): name for name, file_path in shaders.items()}
+
+    assert sorted(shaders.values()) == sorted(str(tmp_path / m[0]) for m in brick)
+    assert f"color3f inputs:diffuseColor.connect = </materials/Brick/{textures['Brick_albedo.png']}.outputs:rgb>" in layer
+    assert f"float inputs:occlusion.connect = </materials/Brick/{textures['Brick_ao.png']}.outputs:r>" in layer
+    assert f"normal3f inputs:normal.connect = </materials/Brick/{textures['Brick_normal.png']}.outputs:rgb>" in layer
+    ### Displacement only comes from the referenced MaterialX document, like the USD export preset
+    assert "inputs:displacement" not in layer
+    assert "prepend references = @./Brick.mtlx@</MaterialX/Materials/Brick>" in layer
+
+
+def test_library_names_are_unique(pbr, tmp_path, capsys):
+    materialData = {
+        "Wood": [metadata("/a/Wood_albedo.png", "DIFFUSE", "Wood")],
+        "a-b": [metadata("/a/a-b_albedo.png", "DIFFUSE", "a-b")],
+        "a_b": [metadata("/a/a_b_albedo.png", "DIFFUSE", "a_b")],
+    }
+    other_folder = {"Wood": [metadata("/b/Wood_albedo.png", "DIFFUSE", "Wood")]}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        library_files, futures = pbr["libraryExport"](materialData, str(tmp_path), executor)
+        other_files, other_futures = pbr["libraryExport"](other_folder, str(tmp_path), executor)
+        for future in futures + other_futures:
+            future.result()
+
+    paths = [path for files in list(library_files.values()) + list(other_files.values()) for path in files]
+    assert len(set(paths)) == len(paths) == 8
+    assert all(os.path.isfile(path) for path in paths)
+    assert os.path.basename(other_files["Wood"][0]) == "Wood_2.mtlx"
+    assert {os.path.basename(library_files["a-b"][0]), os.path.basename(library_files["a_b"][0])} == {"a_b.mtlx", "a_b_2.mtlx"}
+    assert "Wood_2" in capsys.readouterr().out
+
+    ### Every document only holds the textures of its own set
+    with open(other_files["Wood"][1]) as file:
+        assert "@/b/Wood_albedo.png@" in file.read()
+
+
+def test_library_layer_lists_only_the_given_layers(pbr, tmp_path):
+    (tmp_path / "Old.usda").write_text("#usda 1.0\n")
+    with open(pbr["writeLibraryLayer"](str(tmp_path), [str(tmp_path / "Wood.usda"), str(tmp_path / "Brick.usda")])) as file:
+        layer = file.read()
+
+    assert re.findall(r"@\./([^@]+)@", layer) == ["Brick.usda", "Wood.usda"]
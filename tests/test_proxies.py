@@ -0,0 +1,75 @@
+# Checks for the proxy textures (hoiiotool lookup, proxy planning inside texturePipeline and the image node file expression)
+
+import os
+import shutil
+
+import pytest
+
+
+@pytest.fixture
+def textures(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOUDINI_TEMP_DIR", str(tmp_path / "temp"))
+    folder = tmp_path / "textures"
+    folder.mkdir()
+    for index in range(3):
+        for keyword in ["albedo", "normal"]:
+            (folder / f"Brick_{index}_{keyword}.png").write_bytes(b"texture")
+    return folder
+
+
+def setMessages(pbr, folder, with_proxies):
+    messages = list(pbr["texturePipeline"]([str(folder)], "Folder", None, with_proxies))
+    return [message for message in messages if message[0] == "set"]
+
+
+def test_missing_hoiiotool_disables_proxies_once(pbr, textures, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    monkeypatch.setenv("HFS", str(tmp_path / "empty"))
+    pbr["classification_batch_size"] = 2
+
+    sets = setMessages(pbr, textures, True)
+
+    assert len(sets) == 3
+    assert all(message[6] is None for message in sets)
+    assert capsys.readouterr().out.count("hoiiotool couldn't be found") == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the stand-in hoiiotool is a shell script")
+def test_proxies_are_planned_with_hoiiotool(pbr, textures, tmp_path, monkeypatch):
+    bin_folder = tmp_path / "bin"
+    bin_folder.mkdir()
+    hoiiotool = bin_folder / "hoiiotool"
+    hoiiotool.write_text(f'#!/bin/sh\n{shutil.which("cp")} "$1" "$5"\n')
+    hoiiotool.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_folder))
+
+    sets = setMessages(pbr, textures, True)
+
+    assert len(sets) == 3
+    for message in sets:
+        proxies = message[6]
+        for m in message[2]:
+            assert os.path.isfile(proxies[m[0]])
+
+
+def test_proxies_are_off_without_with_proxies(pbr, textures):
+    assert all(message[6] is None for message in setMessages(pbr, textures, False))
+
+
+def test_proxy_expression_escapes_paths(pbr):
+    class Parm:
+        def set(self, value):
+            self.value = value
+
+    class ImageNode:
+        def __init__(self):
+            self.file = Parm()
+
+        def parm(self, name):
+            return self.file
+
+    file_path = 'D:/Textures/Brick "old"/Brick_albedo.png'
+    node = ImageNode()
+    pbr["textureFileParm"](node, file_path, {file_path: "C:\\Temp\\PBR-Express\\proxies\\$HIP\\Brick_albedo.png"})
+
+    assert node.file.value == '`ifs(ch("../useproxy"), "C:/Temp/PBR-Express/proxies/\\$HIP/Brick_albedo.png", "D:/Textures/Brick \\"old\\"/Brick_albedo.png")`'
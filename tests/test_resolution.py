@@ -0,0 +1,98 @@
+# Checks for the selection of one resolution variant per texture (resolutionVariant, resolutionPick, resolutionSelection)
+
+
+def metadata(file_path, texture_type, texture_set):
+    file_name, __sep, file_extension = file_path.rpartition("/")[2].rpartition(".")
+    return (file_path, file_name, texture_type, texture_set, file_extension)
+
+
+def test_resolution_variant(pbr):
+    assert pbr["resolutionVariant"]("Brick_2K") == (2, "Brick")
+    assert pbr["resolutionVariant"]("Brick_4k_Wall") == (4, "Brick_Wall")
+    assert pbr["resolutionVariant"]("brick-8K") == (8, "brick")
+    assert pbr["resolutionVariant"]("Brick") == (None, "Brick")
+    assert pbr["resolutionVariant"]("Brick_2Kx") == (None, "Brick_2Kx")
+    assert pbr["resolutionVariant"]("Brick2K") == (None, "Brick2K")
+    assert pbr["resolutionVariant"]("2K_Brick") == (2, "Brick")
+    assert pbr["resolutionVariant"]("4k-Brick_Wall") == (4, "Brick_Wall")
+
+
+def test_resolution_pick_policies(pbr):
+    pbr["resolution_policy"] = "highest"
+    assert pbr["resolutionPick"]([2, 4, 8]) == 8
+
+    pbr["resolution_policy"] = "lowest"
+    assert pbr["resolutionPick"]([2, 4, 8]) == 2
+
+    pbr["resolution_policy"] = "max"
+    pbr["resolution_max"] = 4
+    assert pbr["resolutionPick"]([2, 4, 8]) == 4
+    ### Nothing at or below the cap, the smallest one is the closest
+    assert pbr["resolutionPick"]([8, 16]) == 8
+
+
+def test_resolution_selection_keeps_one_variant_per_texture(pbr):
+    data = [
+        metadata("/t/Brick_2K_Albedo.png", "DIFFUSE", "Brick_2K"),
+        metadata("/t/Brick_4K_Albedo.png", "DIFFUSE", "Brick_4K"),
+        metadata("/t/Brick_2K_Normal.png", "NORMAL", "Brick_2K"),
+        metadata("/t/Brick_4K_Normal.png", "NORMAL", "Brick_4K"),
+    ]
+    selected, alternates = pbr["resolutionSelection"](data)
+
+    assert sorted(m[0] for m in selected) == ["/t/Brick_4K_Albedo.png", "/t/Brick_4K_Normal.png"]
+    assert {m[3] for m in selected} == {"Brick"}
+    assert alternates["/t/Brick_4K_Albedo.png"] == [("2K", "/t/Brick_2K_Albedo.png")]
+
+
+def test_resolution_selection_treats_unsuffixed_set_as_variant(pbr):
+    data = [
+        metadata("/t/Brick_Albedo.png", "DIFFUSE", "Brick"),
+        metadata("/t/Brick_2K_Albedo.png", "DIFFUSE", "Brick_2K"),
+        metadata("/t/Brick_4K_Albedo.png", "DIFFUSE", "Brick_4K"),
+        metadata("/t/Brick_Normal.png", "NORMAL", "Brick"),
+    ]
+    selected, alternates = pbr["resolutionSelection"](data)
+
+    diffuse = [m for m in selected if m[2] == "DIFFUSE"]
+    assert [m[0] for m in diffuse] == ["/t/Brick_4K_Albedo.png"]
+    assert alternates["/t/Brick_4K_Albedo.png"] == [("2K", "/t/Brick_2K_Albedo.png"), ("original", "/t/Brick_Albedo.png")]
+    ### Texture types that only exist without a suffix are still used
+    assert [m[0] for m in selected if m[2] == "NORMAL"] == ["/t/Brick_Normal.png"]
+    assert {m[3] for m in selected} == {"Brick"}
+
+
+def test_resolution_selection_leaves_single_resolution_sets_alone(pbr):
+    data = [
+        metadata("/t/Brick_2K_Albedo.png", "DIFFUSE", "Brick_2K"),
+        metadata("/t/Stone_Albedo.png", "DIFFUSE", "Stone"),
+    ]
+    selected, alternates = pbr["resolutionSelection"](data)
+
+    assert sorted(selected) == sorted(data)
+    assert alternates == {}
+
+
+def test_tech_checker_wires_a_single_variant(pbr):
+    files = ["/t/Brick_Albedo.png", "/t/Brick_2K_Albedo.png", "/t/Brick_4K_Albedo.png"]
+    data, materialNames = pbr["techChecker"](files, "File")[:2]
+
+    assert materialNames == {"Brick"}
+    assert [m[0] for m in data if m[2] == "DIFFUSE"] == ["/t/Brick_4K_Albedo.png"]
+
+
+def test_tech_checker_redirects_extra_maps_of_resolution_packs(pbr):
+    files = ["/t/Brick_35_2K_albedo.png", "/t/Brick_35_4K_albedo.png", "/t/Brick_35_spec.png", "/t/Brick_3_albedo.png"]
+    data, materialNames, stats_fileProcessed, stats_invalidFiles, stats_UDIMdetected, stats_redirectedTextures, stats_hopelessTextures = pbr["techChecker"](files, "File")[:7]
+
+    assert materialNames == {"Brick_35", "Brick_3"}
+    assert stats_hopelessTextures == []
+    assert {m[0]: m[3] for m in data} == {"/t/Brick_35_4K_albedo.png": "Brick_35", "/t/Brick_35_spec.png": "Brick_35", "/t/Brick_3_albedo.png": "Brick_3"}
+
+
+def test_tech_checker_merges_prefixed_resolutions(pbr):
+    files = ["/t/2K_Brick_Albedo.png", "/t/4K_Brick_Albedo.png", "/t/Brick_Albedo.png"]
+    data, materialNames = pbr["techChecker"](files, "File")[:2]
+
+    assert materialNames == {"Brick"}
+    assert [m[0] for m in data] == ["/t/4K_Brick_Albedo.png"]